@@ -0,0 +1,344 @@
+from opponent_analysis.artifacts import Artifacts
+from opponent_analysis.config import Config
+from opponent_analysis.profiles import Profiles
+from collections import OrderedDict
+import asyncio
+import hashlib
+import json
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import threading
+import time
+import tornado.httpserver
+import tornado.netutil
+import tornado.process
+import tornado.web
+
+
+class KpiApi:
+    """Serves the tables of the current snapshot for other tools. The tables
+    are flattened once per snapshot, a request only filters rows and the
+    serialized responses are kept in a LRU cache, so no pandas pipeline runs
+    per request. A new snapshot is loaded in a background thread while the
+    requests are still answered from the previous one.
+    """
+
+    endpoints = {
+        "kpis": ("df_kpis", ["match_id", "team"]),
+        "goals_xg": ("df_goals_xg", ["team", "player"]),
+        "assists_to_xg": ("df_assists_to_xg", ["team", "player"]),
+        "passed_opponents": ("df_passed_opponents", ["team", "player"]),
+        "broken_lines": ("df_broken_lines", ["team", "player"]),
+        "iv_positions": ("df_iv_position_at_opponent_goal_kick", None),
+        "kpi_profiles": ("df_kpi_profiles", ["team", "opponent", "kpi"]),
+        "pass_network_nodes": (
+            "df_pass_network_nodes",
+            ["match_id", "team", "player"],
+        ),
+        "pass_network_edges": (
+            "df_pass_network_edges",
+            ["match_id", "team", "passer", "recipient"],
+        ),
+    }
+    filters = {
+        "team": "team",
+        "opponent": "opponent",
+        "player": "player",
+        "match": "match_id",
+    }
+    content_types = {
+        "json": "application/json",
+        "arrow": "application/vnd.apache.arrow.stream",
+    }
+
+    def __init__(
+        self,
+    ):
+        self.conf = Config()
+        self.artifacts = Artifacts()
+        self.snapshot = (None, {})
+        self.cache = OrderedDict()
+        self._checked_at = None
+        self._loading = None
+
+    def prepare_table(self, endpoint: str, df: pd.DataFrame):
+        """Turns the index of a snapshot table into columns with the names
+        that are used by the filters
+
+        Args:
+            endpoint (str): name of the endpoint, see endpoints
+            df (pd.DataFrame): the table of the snapshot
+
+        Returns:
+            pd.DataFrame: table without index
+        """
+        index_names = self.endpoints[endpoint][1]
+        if index_names is None:
+            return df.reset_index(drop=True)
+        df = df.rename_axis(index_names).reset_index()
+        if endpoint == "kpis":
+            df_opponents = Profiles().add_opponents(
+                df.set_index(["match_id", "team"])
+            )[["match_id", "team", "opponent"]]
+            df = df.merge(df_opponents, on=["match_id", "team"], how="left")
+        return df
+
+    def load_tables(self, version: str):
+        """Reads and flattens the tables of a snapshot that are served by the
+        endpoints, the other tables of the snapshot are not read
+
+        Args:
+            version (str): name of the snapshot
+
+        Returns:
+            dict: flattened tables by their endpoint
+        """
+        names = [name for name, _ in self.endpoints.values()]
+        snapshot = self.artifacts.read_snapshot(version, names)
+        return {
+            endpoint: self.prepare_table(endpoint, snapshot[name])
+            for endpoint, (name, _) in self.endpoints.items()
+            if snapshot[name] is not None
+        }
+
+    def _reload(self, version: str):
+        try:
+            tables = self.load_tables(version)
+        except FileNotFoundError:
+            # the snapshot was already replaced, the next check loads the
+            # new one
+            return
+        self.snapshot = (version, tables)
+        self.cache = OrderedDict()
+
+    def get_snapshot(self):
+        """Returns the loaded snapshot. The pointer file is checked at most
+        once per api_version_check_seconds. The first snapshot is loaded
+        right away, later ones in a background thread, and the loaded
+        snapshot is only replaced once the new tables are ready.
+
+        Returns:
+            str: name of the loaded snapshot
+            dict: flattened tables by their endpoint
+        """
+        now = time.monotonic()
+        if (
+            self._checked_at is not None
+            and now - self._checked_at < self.conf.api_version_check_seconds
+        ):
+            return self.snapshot
+        self._checked_at = now
+        version = self.artifacts.get_current_version()
+        if version is None or version == self.snapshot[0]:
+            return self.snapshot
+        if self.snapshot[0] is None:
+            self._reload(version)
+        elif self._loading is None or not self._loading.is_alive():
+            self._loading = threading.Thread(
+                target=self._reload,
+                args=(version,),
+                name="opponent-analysis-api-reload",
+                daemon=True,
+            )
+            self._loading.start()
+        return self.snapshot
+
+    def get_key(self, snapshot: tuple, endpoint: str, query: dict, fmt: str):
+        """Checks a request and builds the key of its response. The key
+        contains the snapshot, so it changes with every refresh.
+
+        Args:
+            snapshot (tuple): result of get_snapshot
+            endpoint (str): name of the endpoint
+            query (dict): filters by their name, see filters
+            fmt (str): json or arrow
+
+        Raises:
+            KeyError: if the endpoint does not exist in the snapshot
+            ValueError: if a filter is not available for the endpoint
+
+        Returns:
+            tuple: key of the response
+        """
+        version, tables = snapshot
+        if endpoint not in tables:
+            raise KeyError(endpoint)
+        columns = tables[endpoint].columns
+        for name in query:
+            if name not in self.filters or self.filters[name] not in columns:
+                raise ValueError(
+                    f"Filter {name} is not available for {endpoint}"
+                )
+        return (version, endpoint, tuple(sorted(query.items())), fmt)
+
+    def get_etag(self, key: tuple):
+        """Derives the ETag of a response from its key, so a conditional
+        request is answered without building the response
+
+        Args:
+            key (tuple): result of get_key
+
+        Returns:
+            str: quoted ETag
+        """
+        return '"' + hashlib.sha1(repr(key).encode()).hexdigest() + '"'
+
+    def filter_table(self, df: pd.DataFrame, query: dict):
+        """Selects the rows of a table that match all filters
+
+        Args:
+            df (pd.DataFrame): flattened table of the endpoint
+            query (dict): filters by their name, see filters
+
+        Raises:
+            ValueError: if the match is not a number
+
+        Returns:
+            pd.DataFrame: the selected rows
+        """
+        mask = np.ones(len(df), dtype=bool)
+        for name, value in query.items():
+            column = self.filters[name]
+            if column == "match_id":
+                value = int(value)
+            mask &= (df[column] == value).to_numpy(dtype=bool, na_value=False)
+        return df[mask]
+
+    def serialize(self, df: pd.DataFrame, fmt: str):
+        """Serializes a table as JSON records or as Arrow IPC stream
+
+        Args:
+            df (pd.DataFrame): the selected rows
+            fmt (str): json or arrow
+
+        Returns:
+            bytes: body of the response
+        """
+        if fmt == "arrow":
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            sink = pa.BufferOutputStream()
+            with pa.ipc.new_stream(sink, table.schema) as writer:
+                writer.write_table(table)
+            return sink.getvalue().to_pybytes()
+        return df.to_json(orient="records").encode()
+
+    def get_body(self, snapshot: tuple, key: tuple):
+        """Returns the body of a response from the cache or builds it. The
+        least recently used responses are dropped once api_cache_size is
+        reached.
+
+        Args:
+            snapshot (tuple): result of get_snapshot
+            key (tuple): result of get_key
+
+        Returns:
+            bytes: body of the response
+        """
+        cache = self.cache
+        if key in cache:
+            cache.move_to_end(key)
+            return cache[key]
+        _, endpoint, query, fmt = key
+        df = snapshot[1][endpoint]
+        body = self.serialize(self.filter_table(df, dict(query)), fmt)
+        cache[key] = body
+        if len(cache) > self.conf.api_cache_size:
+            cache.popitem(last=False)
+        return body
+
+
+class IndexHandler(tornado.web.RequestHandler):
+    """Lists the snapshot and the endpoints that it provides"""
+
+    def initialize(self, api: KpiApi):
+        self.api = api
+
+    def get(self):
+        version, tables = self.api.get_snapshot()
+        self.set_header("Content-Type", KpiApi.content_types["json"])
+        self.write(
+            json.dumps(
+                {
+                    "version": version,
+                    "endpoints": list(tables),
+                    "filters": list(KpiApi.filters),
+                }
+            )
+        )
+
+
+class TableHandler(tornado.web.RequestHandler):
+    """Returns the rows of a table that match the filters in the query. The
+    response is Arrow if the Accept header asks for it and JSON otherwise.
+    """
+
+    def initialize(self, api: KpiApi):
+        self.api = api
+
+    def get(self, endpoint: str):
+        accept = self.request.headers.get("Accept", "")
+        fmt = "arrow" if KpiApi.content_types["arrow"] in accept else "json"
+        query = {
+            name: self.get_query_argument(name)
+            for name in self.request.query_arguments
+        }
+        snapshot = self.api.get_snapshot()
+        try:
+            key = self.api.get_key(snapshot, endpoint, query, fmt)
+        except KeyError:
+            raise tornado.web.HTTPError(404)
+        except ValueError as error:
+            raise tornado.web.HTTPError(400, reason=str(error))
+        self.set_header("ETag", self.api.get_etag(key))
+        self.set_header("Vary", "Accept")
+        self.set_header("Content-Type", KpiApi.content_types[fmt])
+        if self.check_etag_header():
+            self.set_status(304)
+            return
+        try:
+            self.write(self.api.get_body(snapshot, key))
+        except ValueError:
+            raise tornado.web.HTTPError(400, reason="match has to be a number")
+
+
+def make_app(api: KpiApi = None):
+    """Creates the tornado application of the API
+
+    Args:
+        api (KpiApi, optional): the API, a new one if None
+
+    Returns:
+        tornado.web.Application: the application
+    """
+    api = api if api is not None else KpiApi()
+    return tornado.web.Application(
+        [
+            (r"/", IndexHandler, {"api": api}),
+            (r"/([a-z_]+)", TableHandler, {"api": api}),
+        ]
+    )
+
+
+def main():
+    """Serves the API on the address and port set in the config. With
+    api_processes other than 1 the server is forked into several processes,
+    0 starts one per CPU. The processes share the memory mapped snapshot.
+    """
+    conf = Config()
+    sockets = tornado.netutil.bind_sockets(
+        conf.api_port, address=conf.api_address
+    )
+    if conf.api_processes != 1:
+        tornado.process.fork_processes(conf.api_processes)
+
+    async def serve():
+        server = tornado.httpserver.HTTPServer(make_app())
+        server.add_sockets(sockets)
+        await asyncio.Event().wait()
+
+    asyncio.run(serve())
+
+
+if __name__ == "__main__":
+    main()
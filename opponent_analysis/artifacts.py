@@ -0,0 +1,377 @@
+from opponent_analysis.config import Config
+from opponent_analysis.profiles import Profiles
+import pandas as pd
+import pyarrow as pa
+import os
+import shutil
+import time
+
+
+class Artifacts:
+    """Writes and reads the precomputed dataframes that are displayed in the
+    dashboard. Every refresh is stored as a new snapshot folder and the
+    snapshot that is served is switched atomically by a pointer file.
+    The tables of a snapshot are uncompressed Arrow files that are memory
+    mapped, so all sessions and processes on a host share the same pages.
+    """
+
+    index_cols = {
+        "df_kpis": [0, 1],
+        "df_iv_position_at_opponent_goal_kick": 0,
+        "df_goals_xg": [0, 1],
+        "df_assists_to_xg": [0, 1],
+        "df_preprocessed": 0,
+        "df_passed_opponents": [0, 1],
+        "df_kpi_profiles": [0, 1, 2],
+        "df_team_features": 0,
+        "df_player_features": [0, 1],
+        "df_broken_lines": [0, 1],
+        "df_pass_network_nodes": [0, 1, 2],
+        "df_pass_network_edges": [0, 1, 2, 3],
+    }
+    partitioned = {"df_preprocessed"}
+    optional = {
+        "df_team_features",
+        "df_player_features",
+        "df_broken_lines",
+        "df_pass_network_nodes",
+        "df_pass_network_edges",
+    }
+    legacy_version = "legacy"
+
+    def __init__(
+        self,
+    ):
+        self.conf = Config()
+
+    def _pointer_file(self):
+        return os.path.join(self.conf.path_to_artifacts, "CURRENT")
+
+    def _snapshot_dir(self, version: str):
+        if version == self.legacy_version:
+            return self.conf.path_to_legacy_artifacts
+        return os.path.join(self.conf.path_to_artifacts, version)
+
+    def _table_path(self, version: str, name: str):
+        if version == self.legacy_version:
+            return os.path.join(self._snapshot_dir(version), f"{name}.csv")
+        if name in self.partitioned:
+            return os.path.join(self._snapshot_dir(version), name)
+        return os.path.join(self._snapshot_dir(version), f"{name}.arrow")
+
+    def get_current_version(self):
+        """Looks up the snapshot that is served at the moment. If no snapshot
+        was written yet the csv files in the root of the repo are used.
+
+        Returns:
+            str: name of the current snapshot or None if there is no data
+        """
+        try:
+            with open(self._pointer_file()) as f:
+                return f.read().strip()
+        except FileNotFoundError:
+            pass
+        legacy_file = os.path.join(
+            self.conf.path_to_legacy_artifacts, "df_preprocessed_1.csv"
+        )
+        if os.path.exists(legacy_file):
+            return self.legacy_version
+        return None
+
+    def get_age_hours(self, version: str):
+        """Determines how old a snapshot is
+
+        Args:
+            version (str): name of the snapshot
+
+        Returns:
+            float: age of the snapshot in hours
+        """
+        path = self._table_path(version, "df_kpis")
+        return (time.time() - os.path.getmtime(path)) / 3600
+
+    def is_outdated(self, version: str):
+        """Checks whether a snapshot is missing or older than allowed by the
+        config
+
+        Args:
+            version (str): name of the snapshot, can be None
+
+        Returns:
+            bool: True if a refresh is needed
+        """
+        if version is None:
+            return True
+        return self.get_age_hours(version) > self.conf.artifact_max_age_hours
+
+    def create_snapshot(self):
+        """Creates a temporary folder for a new snapshot. It is only served
+        after publish_snapshot was called. The name starts with the UTC time,
+        so the names sort by age regardless of time zone changes.
+
+        Returns:
+            str: name of the new snapshot
+        """
+        now = time.time_ns()
+        version = (
+            time.strftime("%Y%m%d-%H%M%S", time.gmtime(now // 10**9))
+            + f"-{now % 10**9:09d}-{os.getpid()}"
+        )
+        os.makedirs(self._tmp_dir(version))
+        return version
+
+    def _tmp_dir(self, version: str):
+        return os.path.join(self.conf.path_to_artifacts, f".tmp-{version}")
+
+    def add_table(self, version: str, name: str, df: pd.DataFrame):
+        """Writes a table into a snapshot that is not published yet
+
+        Args:
+            version (str): name of the snapshot
+            name (str): name of the table, see index_cols
+            df (pd.DataFrame): the table
+        """
+        self.write_table(
+            df, os.path.join(self._tmp_dir(version), f"{name}.arrow")
+        )
+
+    def add_table_part(
+        self, version: str, name: str, part: int, df: pd.DataFrame
+    ):  # noqa: E501
+        """Writes one part of a table into a snapshot that is not published
+        yet. The parts are concatenated when the table is read, so a table
+        never has to be in memory as a whole while it is written.
+
+        Args:
+            version (str): name of the snapshot
+            name (str): name of the table, see index_cols
+            part (int): number of the part
+            df (pd.DataFrame): the part of the table
+        """
+        table_dir = os.path.join(self._tmp_dir(version), name)
+        os.makedirs(table_dir, exist_ok=True)
+        self.write_table(df, os.path.join(table_dir, f"part-{part:05d}.arrow"))
+
+    def publish_snapshot(self, version: str):
+        """Moves the snapshot folder to its final place and afterwards swaps
+        the pointer file. Readers either see the old or the new snapshot but
+        never a half written one.
+
+        Args:
+            version (str): name of the snapshot
+        """
+        os.rename(self._tmp_dir(version), self._snapshot_dir(version))
+        tmp_pointer = f"{self._pointer_file()}.tmp-{version}"
+        with open(tmp_pointer, "w") as f:
+            f.write(version)
+        os.replace(tmp_pointer, self._pointer_file())
+        self.remove_old_snapshots()
+
+    def discard_snapshot(self, version: str):
+        """Deletes a snapshot that was not published
+
+        Args:
+            version (str): name of the snapshot
+        """
+        shutil.rmtree(self._tmp_dir(version), ignore_errors=True)
+
+    def write_snapshot(self, tables: dict):
+        """Writes all tables into a new snapshot and publishes it
+
+        Args:
+            tables (dict): dataframes by their name, see index_cols. The
+              optional tables can be left out.
+
+        Returns:
+            str: name of the new snapshot
+        """
+        version = self.create_snapshot()
+        for name in self.index_cols:
+            if name in self.optional and tables.get(name) is None:
+                continue
+            if name in self.partitioned:
+                self.add_table_part(version, name, 0, tables[name])
+            else:
+                self.add_table(version, name, tables[name])
+        self.publish_snapshot(version)
+        return version
+
+    def to_arrow(self, df: pd.DataFrame):
+        """Converts a dataframe to an arrow table. Nested values like the
+        locations or the freeze frames are stored as strings, the same way
+        they end up in a csv file.
+
+        Args:
+            df (pd.DataFrame): any of the tables of a snapshot
+
+        Returns:
+            pyarrow.Table: table including the index of the dataframe
+        """
+        if isinstance(df, pd.Series):
+            df = df.to_frame()
+        df = df.copy()
+        for col in df.columns[df.dtypes == object]:
+            nested = df[col].map(lambda v: isinstance(v, (list, dict, tuple)))
+            if nested.any():
+                df.loc[nested, col] = df.loc[nested, col].map(str)
+            try:
+                pa.array(df[col], from_pandas=True)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                df[col] = df[col].map(lambda v: v if pd.isna(v) else str(v))
+        return pa.Table.from_pandas(df, preserve_index=True)
+
+    def write_table(self, df: pd.DataFrame, path: str):
+        """Writes a dataframe as uncompressed Arrow IPC file, which can be
+        memory mapped without copying it.
+
+        Args:
+            df (pd.DataFrame): any of the tables of a snapshot
+            path (str): path of the file
+        """
+        table = self.to_arrow(df)
+        with pa.OSFile(path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+
+    def _unify_tables(self, tables: list):
+        """Brings the parts of a table to one schema. Columns that are
+        missing in a part are filled with nulls and columns whose type
+        differs between the parts are cast to float or string.
+
+        Args:
+            tables (list): arrow tables
+
+        Returns:
+            list: arrow tables with the same schema
+        """
+        types = {}
+        for table in tables:
+            for field in table.schema:
+                types.setdefault(field.name, set()).add(field.type)
+        fields = []
+        for name, candidates in types.items():
+            candidates.discard(pa.null())
+            if len(candidates) == 0:
+                fields.append(pa.field(name, pa.null()))
+            elif len(candidates) == 1:
+                fields.append(pa.field(name, candidates.pop()))
+            elif all(
+                pa.types.is_integer(t) or pa.types.is_floating(t)
+                for t in candidates
+            ):
+                fields.append(pa.field(name, pa.float64()))
+            else:
+                fields.append(pa.field(name, pa.string()))
+        schema = pa.schema(fields, metadata=tables[0].schema.metadata)
+        unified = []
+        for table in tables:
+            columns = []
+            for field in schema:
+                if field.name not in table.column_names:
+                    columns.append(pa.nulls(len(table), field.type))
+                elif table.schema.field(field.name).type != field.type:
+                    columns.append(table[field.name].cast(field.type))
+                else:
+                    columns.append(table[field.name])
+            unified.append(pa.Table.from_arrays(columns, schema=schema))
+        return unified
+
+    def read_table(self, path: str):
+        """Memory maps an Arrow file or a folder with the parts of a table.
+        The columns of the dataframe are backed by the mapped files, only
+        columns that have to be brought to a common type are copied.
+
+        Args:
+            path (str): path of the file or folder
+
+        Returns:
+            pd.DataFrame: dataframe with pyarrow dtypes
+        """
+        if os.path.isdir(path):
+            paths = [
+                os.path.join(path, part) for part in sorted(os.listdir(path))
+            ]
+        else:
+            paths = [path]
+        tables = [
+            pa.ipc.open_file(pa.memory_map(part, "r")).read_all()
+            for part in paths
+        ]
+        if len(tables) > 1:
+            tables = self._unify_tables(tables)
+        table = pa.concat_tables(tables)
+        return table.to_pandas(types_mapper=pd.ArrowDtype)
+
+    def remove_old_snapshots(self):
+        """Deletes all but the newest snapshots, the snapshot that is served
+        is never deleted. The number of snapshots that are kept is set in
+        the config. Temporary folders and pointer files of refreshes that
+        were killed are deleted once they are older than
+        artifact_max_age_hours.
+        """
+        current = self.get_current_version()
+        entries = os.listdir(self.conf.path_to_artifacts)
+        versions = sorted(
+            entry
+            for entry in entries
+            if os.path.isdir(os.path.join(self.conf.path_to_artifacts, entry))
+            and not entry.startswith(".")
+        )
+        for version in versions[: -self.conf.artifacts_to_keep]:
+            if version != current:
+                shutil.rmtree(self._snapshot_dir(version), ignore_errors=True)
+        for entry in entries:
+            if not entry.startswith((".tmp-", "CURRENT.tmp-")):
+                continue
+            path = os.path.join(self.conf.path_to_artifacts, entry)
+            try:
+                age_hours = (time.time() - os.path.getmtime(path)) / 3600
+                if age_hours <= self.conf.artifact_max_age_hours:
+                    continue
+                if os.path.isdir(path):
+                    shutil.rmtree(path, ignore_errors=True)
+                else:
+                    os.remove(path)
+            except FileNotFoundError:
+                # removed by another process in the meantime
+                pass
+
+    def read_snapshot(self, version: str, names: list = None):
+        """Reads the tables of a snapshot
+
+        Args:
+            version (str): name of the snapshot
+            names (list, optional): names of the tables to read, all tables
+              if None
+
+        Returns:
+            dict: dataframes by their name, optional tables that older
+            snapshots do not have are None
+        """
+        snapshot_dir = self._snapshot_dir(version)
+        tables = {}
+        for name in self.index_cols if names is None else names:
+            index_col = self.index_cols[name]
+            path = self._table_path(version, name)
+            if name == "df_kpi_profiles" and not os.path.exists(path):
+                # snapshots from before the profiles were precomputed
+                if "df_kpis" not in tables:
+                    tables.update(self.read_snapshot(version, ["df_kpis"]))
+                tables[name] = Profiles().run_profiles(tables["df_kpis"])
+            elif name in self.optional and not os.path.exists(path):
+                tables[name] = None
+            elif version == self.legacy_version and name == "df_preprocessed":
+                tables[name] = pd.concat(
+                    [
+                        pd.read_csv(
+                            os.path.join(snapshot_dir, f"{name}_{i}.csv"),
+                            index_col=index_col,
+                        )
+                        for i in (1, 2)
+                    ]
+                )
+            elif version == self.legacy_version:
+                tables[name] = pd.read_csv(path, index_col=index_col)
+            else:
+                tables[name] = self.read_table(path)
+        return tables
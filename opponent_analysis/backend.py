@@ -0,0 +1,28 @@
+from opponent_analysis.config import Config
+from opponent_analysis.kpis import KPIs
+from opponent_analysis.preprocessing import Preprocessing
+
+
+class Backend:
+    """Chooses the implementation of the preprocessing and the KPIs that is
+    set in the config. Polars is an optional dependency and only imported if
+    it is selected.
+    """
+
+    def __init__(
+        self,
+    ):
+        self.conf = Config()
+        if self.conf.backend == "pandas":
+            self.preprocessing = Preprocessing()
+            self.kpis = KPIs()
+        elif self.conf.backend == "polars":
+            from opponent_analysis.polars_backend import (
+                PolarsKPIs,
+                PolarsPreprocessing,
+            )
+
+            self.preprocessing = PolarsPreprocessing()
+            self.kpis = PolarsKPIs()
+        else:
+            raise ValueError(f"Unknown backend {self.conf.backend}")
@@ -9,3 +9,32 @@ class Config:
         self.season_name = "2022"
         self.date_of_analysis = "2022-07-30"
         self.path_to_statsbomb_open_data = "360/"
+        self.path_to_legacy_artifacts = "./"
+        self.path_to_artifacts = "artifacts/"
+        self.artifacts_to_keep = 2
+        self.artifact_max_age_hours = 24
+        self.refresh_retry_minutes = 15
+        self.use_streaming = False
+        self.streaming_batch_size = 1
+        self.backend = "pandas"
+        self.kpi_high_is_good = {
+            "goals_scored": 1,
+            "goals_conceded": -1,
+            "shot_statsbomb_xg_scored": 1,
+            "shot_statsbomb_xg_conceded": -1,
+            "shots": 1,
+            "passes": 1,
+            "pass_accuracy": 1,
+            "interceptions": 1,
+            "clearances": 1,
+            "possession": 1,
+        }
+        self.kpi_std_tolerance = 0.25
+        self.line_max_gap = 5
+        self.line_min_players = 2
+        self.pass_network_min_passes = 2
+        self.api_address = "127.0.0.1"
+        self.api_port = 8502
+        self.api_processes = 1
+        self.api_cache_size = 1024
+        self.api_version_check_seconds = 1
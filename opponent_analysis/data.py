@@ -1,13 +1,13 @@
 from opponent_analysis.config import Config
 import pandas as pd
-from statsbombpy import sb
 import streamlit as st
 import numpy as np
 
 
 class Data:
     """This class gahters all the functions that are needed to get the data
-    from statsbomb and merge them
+    from statsbomb and merge them. The statsbomb client is only imported when
+    data is fetched.
     """
 
     def __init__(
@@ -26,6 +26,7 @@ class Data:
         Returns:
             numpy.ndarray: array of match ids
         """
+        from statsbombpy import sb
 
         competitions = sb.competitions()
         womens_euro_competition = competitions[
@@ -44,6 +45,31 @@ class Data:
         ].match_id  # noqa: E501
         return match_ids
 
+    def load_match(self, match_id: int):
+        """This function loads the event data of one match and merges it with
+        the 360 data from the local json file.
+
+        Args:
+            match_id (int): id of the match
+
+        Returns:
+            pd.DataFrame: merged event and 360 data of the match
+        """
+        from statsbombpy import sb
+
+        event_data = sb.events(match_id=match_id)
+        df_360 = pd.read_json(
+            f"{self.conf.path_to_statsbomb_open_data}{match_id}.json"
+        )  # noqa: E501
+        df_merged = pd.merge(
+            event_data,
+            df_360,
+            how="left",
+            left_on="id",
+            right_on="event_uuid",  # noqa: E501
+        )
+        return df_merged
+
     @st.cache_data
     def load_statsbomb_data(_self, match_ids: np.ndarray):
         """This function loads the event data and reads the 360 data from local
@@ -57,22 +83,35 @@ class Data:
         """
         event_data_tot = pd.DataFrame()
         for match_id in match_ids:
-            event_data = sb.events(match_id=match_id)
-            df_360 = pd.read_json(
-                f"{_self.conf.path_to_statsbomb_open_data}{match_id}.json"  # noqa: E501
-            )
-            df_merged = pd.merge(
-                event_data,
-                df_360,
-                how="left",
-                left_on="id",
-                right_on="event_uuid",  # noqa: E501
-            )
+            df_merged = _self.load_match(match_id)
             event_data_tot = pd.concat(
                 [event_data_tot, df_merged], ignore_index=True
             )  # noqa: E501
         return event_data_tot
 
+    def iter_statsbomb_data(self, match_ids: np.ndarray, batch_size: int):
+        """Loads the merged event and 360 data batch by batch. Only one batch
+        is in memory at a time and a match is never split between batches.
+
+        Args:
+            match_ids (np.ndarray): array of match ids
+            batch_size (int): number of matches in each batch
+
+        Yields:
+            pd.DataFrame: merged event and 360 data of the matches in the
+            batch
+        """
+        match_ids = list(match_ids)
+        for start in range(0, len(match_ids), batch_size):
+            end = start + batch_size
+            yield pd.concat(
+                [
+                    self.load_match(match_id)
+                    for match_id in match_ids[start:end]
+                ],
+                ignore_index=True,
+            )
+
     @st.cache_data
     def get_data(_self):
         """Runs all the nesseccary function and returns the data
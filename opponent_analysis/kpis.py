@@ -1,4 +1,5 @@
 from opponent_analysis.config import Config
+import numpy as np
 import pandas as pd
 
 
@@ -12,6 +13,24 @@ class KPIs:
     ):
         self.conf = Config()
 
+    def get_coordinates(self, locations: pd.Series, axis: int):
+        """Gets one coordinate of a location column
+
+        Args:
+            locations (pd.Series): column with [x, y] lists
+            axis (int): 0 for x and 1 for y
+
+        Returns:
+            np.ndarray: the coordinate or nan if the location is missing
+        """
+        return np.array(
+            [
+                loc[axis] if isinstance(loc, list) else np.nan
+                for loc in locations
+            ],
+            dtype=float,
+        )
+
     def get_time_delta_from_opponent_goal_kick(
         self, df_preprocessed: pd.DataFrame
     ):  # noqa: E501
@@ -168,6 +187,117 @@ class KPIs:
         )
         return df_result
 
+    def get_complete_passes(self, df: pd.DataFrame):
+        """Selects the complete passes that have a freeze frame
+
+        Args:
+            df (pd.DataFrame): preprocessed dataframe with event and 360 data
+
+        Returns:
+            pd.DataFrame: complete passes with start, end and freeze frame
+        """
+        return df[
+            df["location"].notna()
+            & df["pass_end_location"].notna()
+            & df["freeze_frame"].notna()
+            & df["pass_outcome"].isnull()
+        ]
+
+    def flatten_opponents(self, freeze_frames: pd.Series):
+        """Flattens the opponents of all freeze frames into one array, so the
+        KPIs can compare them with the passes at once
+
+        Args:
+            freeze_frames (pd.Series): freeze frames of the 360 data
+
+        Returns:
+            np.ndarray: position of the freeze frame of each opponent
+            np.ndarray: x coordinate of each opponent
+            np.ndarray: True if the opponent is the keeper
+        """
+        opponents = [
+            (i, player["location"][0], player.get("keeper", False))
+            for i, freeze_frame in enumerate(freeze_frames)
+            for player in freeze_frame
+            if not player["teammate"]
+        ]
+        if len(opponents) == 0:
+            return np.empty(0, int), np.empty(0), np.empty(0, bool)
+        frame_nr, x, keeper = zip(*opponents)
+        return (
+            np.array(frame_nr, dtype=int),
+            np.array(x, dtype=float),
+            np.array(keeper, dtype=bool),
+        )
+
+    def get_defensive_lines(self, frame_nr: np.ndarray, x: np.ndarray):
+        """Clusters the opponents of each freeze frame into defensive lines.
+        The opponents are sorted by x within their freeze frame and a new
+        line starts wherever the gap to the previous opponent is larger than
+        line_max_gap. Lines with less than line_min_players are dropped.
+
+        Args:
+            frame_nr (np.ndarray): freeze frame of each opponent, see
+              flatten_opponents
+            x (np.ndarray): x coordinate of each opponent
+
+        Returns:
+            np.ndarray: freeze frame of each line
+            np.ndarray: smallest x of each line
+            np.ndarray: largest x of each line
+        """
+        order = np.lexsort((x, frame_nr))
+        frame_nr = frame_nr[order]
+        x = x[order]
+        new_line = np.ones(len(x), dtype=bool)
+        new_line[1:] = (frame_nr[1:] != frame_nr[:-1]) | (
+            np.diff(x) > self.conf.line_max_gap
+        )
+        line_start = np.flatnonzero(new_line)
+        line_end = np.append(line_start[1:], len(x)) - 1
+        is_line = line_end - line_start + 1 >= self.conf.line_min_players
+        line_start = line_start[is_line]
+        line_end = line_end[is_line]
+        return frame_nr[line_start], x[line_start], x[line_end]
+
+    def get_broken_lines(self, df: pd.DataFrame):
+        """Counts the defensive lines of the opponent that were broken by a
+        complete pass, i.e. the pass starts in front of the line and ends
+        behind it. The keeper is not part of any line.
+
+        Args:
+            df (pd.DataFrame): preprocessed dataframe with event and 360 data
+
+        Returns:
+            pd.Series: total broken lines for each player. Team is in the
+            index.
+        """
+        df_passes = self.get_complete_passes(df)
+        start_x = self.get_coordinates(df_passes["location"], 0)
+        end_x = self.get_coordinates(df_passes["pass_end_location"], 0)
+        frame_nr, x, keeper = self.flatten_opponents(df_passes["freeze_frame"])
+        line_nr, line_min_x, line_max_x = self.get_defensive_lines(
+            frame_nr[~keeper], x[~keeper]
+        )
+        is_broken = (start_x[line_nr] < line_min_x) & (
+            end_x[line_nr] > line_max_x
+        )
+        broken_lines = np.bincount(
+            line_nr[is_broken], minlength=len(df_passes)
+        )
+        return (
+            pd.DataFrame(
+                {
+                    "team": df_passes["team"].values,
+                    "player": df_passes["player"].values,
+                    "broken_lines": broken_lines,
+                }
+            )
+            .groupby(["team", "player"])
+            .broken_lines.sum()
+            .sort_values(ascending=False)
+        )
+
     def get_assists_to_xg(self, df: pd.DataFrame):
         """This function takes a look at the assist that were given to a shot,
         especially the expected goals for that shot.
@@ -281,6 +411,7 @@ class KPIs:
             pd.DataFrame: xg goals for each player
             pd.DataFrame: assists to xg for each player
             pd.DataFrame: passed opponents by a pass for each player
+            pd.DataFrame: broken defensive lines by a pass for each player
         """
         df_time_delta = self.get_time_delta_from_opponent_goal_kick(
             df_preprocessed
@@ -296,10 +427,76 @@ class KPIs:
         df_goals_xg = self.get_goals_xg(df_preprocessed)
         df_assists_to_xg = self.get_assists_to_xg(df_preprocessed)
         df_passed_opponents = self.get_passed_opponents(df_preprocessed)
+        df_broken_lines = self.get_broken_lines(df_preprocessed)
+        return (
+            df_kpis,
+            df_iv_position_at_opponent_goal_kick,
+            df_goals_xg,
+            df_assists_to_xg,
+            df_passed_opponents,
+            df_broken_lines,
+        )
+
+    def reduce_kpis(self, partials: list):
+        """Combines the results of run_kpis for several batches of matches to
+        the results for all matches. The per match tables are concatenated
+        and the per player sums are added up.
+
+        Args:
+            partials (list): results of run_kpis, one for each batch
+
+        Returns:
+            pd.DataFrame: high level KPIs
+            pd.DataFrame: center position at opponent goal kick
+            pd.DataFrame: xg goals for each player
+            pd.DataFrame: assists to xg for each player
+            pd.DataFrame: passed opponents by a pass for each player
+            pd.DataFrame: broken defensive lines by a pass for each player
+        """
+        (
+            kpis,
+            iv_positions,
+            goals_xg,
+            assists_to_xg,
+            passed_opponents,
+            broken_lines,
+        ) = zip(*partials)
+        df_kpis = pd.concat(kpis)
+        df_iv_position_at_opponent_goal_kick = pd.concat(
+            [df for df in iv_positions if len(df) > 0] or iv_positions[:1],
+            ignore_index=True,
+        )
+        df_goals_xg = (
+            pd.concat(goals_xg)
+            .groupby(level=["team", "player"])
+            .sum()
+            .sort_values(
+                ["team", "shot_outcome", "shot_statsbomb_xg"], ascending=False
+            )
+        )
+        df_assists_to_xg = (
+            pd.concat(assists_to_xg)
+            .groupby(level=["team", "player_assisted"])
+            .sum()
+            .sort_values(["team", "shot_statsbomb_xg"], ascending=False)
+        )
+        df_passed_opponents = (
+            pd.concat(passed_opponents)
+            .groupby(level=["team", "player"])
+            .sum()
+            .sort_values(ascending=False)
+        )
+        df_broken_lines = (
+            pd.concat(broken_lines)
+            .groupby(level=["team", "player"])
+            .sum()
+            .sort_values(ascending=False)
+        )
         return (
             df_kpis,
             df_iv_position_at_opponent_goal_kick,
             df_goals_xg,
             df_assists_to_xg,
             df_passed_opponents,
+            df_broken_lines,
         )
@@ -0,0 +1,233 @@
+from opponent_analysis.config import Config
+from opponent_analysis.kpis import KPIs
+import numpy as np
+import pandas as pd
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import scipy.sparse
+
+
+class PassNetwork:
+    """Builds the passer to receiver network of every team in every match.
+    All networks are stored in one sparse adjacency matrix. The players are
+    sorted by match and team, so the matrix is block diagonal with one block
+    per network. Passes, receptions and degree centrality of all networks
+    are computed at once from the matrix, closeness and betweenness are
+    computed block by block. scipy is only imported when the networks are
+    built, so importing the dashboard stays fast.
+    """
+
+    def __init__(
+        self,
+    ):
+        self.conf = Config()
+
+    def get_passes(self, df_preprocessed: pd.DataFrame):
+        """Selects the complete passes with a known recipient
+
+        Args:
+            df_preprocessed (pd.DataFrame): preprocessed dataframe with event
+              and 360 data
+
+        Returns:
+            pd.DataFrame: match, team, passer and recipient of each pass
+        """
+        df_passes = df_preprocessed[
+            (df_preprocessed["type"] == "Pass")
+            & df_preprocessed["pass_outcome"].isnull()
+            & df_preprocessed["player"].notna()
+            & df_preprocessed["pass_recipient"].notna()
+            & (df_preprocessed["player"] != df_preprocessed["pass_recipient"])
+        ]
+        return df_passes[["match_id", "team", "player", "pass_recipient"]]
+
+    def get_average_locations(
+        self, df_preprocessed: pd.DataFrame, nodes: pd.MultiIndex
+    ):  # noqa: E501
+        """Determines the average location of the events of each player in
+        the network
+
+        Args:
+            df_preprocessed (pd.DataFrame): preprocessed dataframe with event
+              and 360 data
+            nodes (pd.MultiIndex): match, team and player of each node
+
+        Returns:
+            pd.DataFrame: average x and y for each node, nan if the player
+            has no event with a location
+        """
+        kpis = KPIs()
+        df_locations = pd.DataFrame(
+            {
+                "match_id": df_preprocessed["match_id"].values,
+                "team": df_preprocessed["team"].values,
+                "player": df_preprocessed["player"].values,
+                "x": kpis.get_coordinates(df_preprocessed["location"], 0),
+                "y": kpis.get_coordinates(df_preprocessed["location"], 1),
+            }
+        ).dropna(subset=["player"])
+        return (
+            df_locations.groupby(["match_id", "team", "player"])
+            .mean()
+            .reindex(nodes)
+        )
+
+    def get_blocks(self, nodes: pd.MultiIndex):
+        """Finds the rows of the adjacency matrix that belong to each
+        network
+
+        Args:
+            nodes (pd.MultiIndex): sorted match, team and player of each node
+
+        Returns:
+            np.ndarray: first row of each network
+            np.ndarray: row after the last row of each network
+        """
+        match_codes, team_codes = nodes.codes[0], nodes.codes[1]
+        new_block = np.ones(len(nodes), dtype=bool)
+        new_block[1:] = (match_codes[1:] != match_codes[:-1]) | (
+            team_codes[1:] != team_codes[:-1]
+        )
+        starts = np.flatnonzero(new_block)
+        return starts, np.append(starts[1:], len(nodes))
+
+    def get_path_metrics(self, adjacency: "scipy.sparse.csr_matrix"):
+        """Calculates closeness and betweenness of one network. The distance
+        of an edge is one over the number of passes, so players that pass a
+        lot to each other are close. For each pair of players one shortest
+        path is followed back through the predecessors, vectorized over all
+        pairs.
+
+        Args:
+            adjacency (sparse.csr_matrix): number of passes from row player
+              to column player
+
+        Returns:
+            np.ndarray: closeness of each player based on the distances from
+            the teammates to the player
+            np.ndarray: normalized betweenness of each player
+        """
+        from scipy.sparse import csgraph
+
+        n = adjacency.shape[0]
+        distances = adjacency.copy()
+        distances.data = 1 / distances.data
+        dist, predecessors = csgraph.shortest_path(
+            distances, directed=True, return_predecessors=True
+        )
+        reachable = np.isfinite(dist) & ~np.eye(n, dtype=bool)
+        n_reachable = reachable.sum(axis=0)
+        total_dist = np.where(reachable, dist, 0).sum(axis=0)
+        closeness = np.zeros(n)
+        has_paths = total_dist > 0
+        closeness[has_paths] = (
+            n_reachable[has_paths]
+            / max(n - 1, 1)
+            * n_reachable[has_paths]
+            / total_dist[has_paths]
+        )
+        source, target = np.nonzero(reachable)
+        current = predecessors[source, target]
+        betweenness = np.zeros(n)
+        while True:
+            inner = current != source
+            source = source[inner]
+            current = current[inner]
+            if len(current) == 0:
+                break
+            betweenness += np.bincount(current, minlength=n)
+            current = predecessors[source, current]
+        if n > 2:
+            betweenness /= (n - 1) * (n - 2)
+        return closeness, betweenness
+
+    def run_pass_network(self, df_preprocessed: pd.DataFrame):
+        """Builds the pass networks of all teams in all matches and
+        calculates the metrics of the players
+
+        Args:
+            df_preprocessed (pd.DataFrame): preprocessed dataframe with event
+              and 360 data
+
+        Returns:
+            pd.DataFrame: average location, passes, receptions, degree
+            centrality, closeness and betweenness for each player. Match,
+            team and player are in the index.
+            pd.DataFrame: number of passes between two players. Match, team,
+            passer and recipient are in the index.
+        """
+        from scipy import sparse
+
+        df_passes = self.get_passes(df_preprocessed)
+        passers = pd.MultiIndex.from_arrays(
+            [df_passes["match_id"], df_passes["team"], df_passes["player"]],
+            names=["match_id", "team", "player"],
+        )
+        recipients = pd.MultiIndex.from_arrays(
+            [
+                df_passes["match_id"],
+                df_passes["team"],
+                df_passes["pass_recipient"],
+            ],
+            names=["match_id", "team", "player"],
+        )
+        nodes = passers.append(recipients).unique().sort_values()
+        n = len(nodes)
+        adjacency = sparse.coo_matrix(
+            (
+                np.ones(len(df_passes)),
+                (nodes.get_indexer(passers), nodes.get_indexer(recipients)),
+            ),
+            shape=(n, n),
+        ).tocsr()
+        adjacency.sum_duplicates()
+
+        starts, ends = self.get_blocks(nodes)
+        block_size = np.repeat(ends - starts, ends - starts)
+        neighbours = ((adjacency + adjacency.T) > 0).getnnz(axis=1)
+        closeness = np.zeros(n)
+        betweenness = np.zeros(n)
+        for start, end in zip(starts, ends):
+            (
+                closeness[start:end],
+                betweenness[start:end],
+            ) = self.get_path_metrics(adjacency[start:end, start:end])
+
+        df_nodes = self.get_average_locations(df_preprocessed, nodes)
+        df_nodes["passes"] = np.asarray(adjacency.sum(axis=1)).ravel()
+        df_nodes["receptions"] = np.asarray(adjacency.sum(axis=0)).ravel()
+        df_nodes["degree_centrality"] = neighbours / np.maximum(
+            block_size - 1, 1
+        )
+        df_nodes["closeness"] = closeness
+        df_nodes["betweenness"] = betweenness
+
+        edges = adjacency.tocoo()
+        df_edges = pd.DataFrame(
+            {"passes": edges.data},
+            index=pd.MultiIndex.from_arrays(
+                [
+                    nodes.get_level_values("match_id")[edges.row],
+                    nodes.get_level_values("team")[edges.row],
+                    nodes.get_level_values("player")[edges.row],
+                    nodes.get_level_values("player")[edges.col],
+                ],
+                names=["match_id", "team", "passer", "recipient"],
+            ),
+        ).sort_index()
+        return df_nodes, df_edges
+
+    def reduce_pass_networks(self, partials: list):
+        """Combines the pass networks of several batches of matches. The
+        networks are per match, so they are only concatenated.
+
+        Args:
+            partials (list): results of run_pass_network
+
+        Returns:
+            pd.DataFrame: metrics for each player in each match
+            pd.DataFrame: passes between two players in each match
+        """
+        nodes, edges = zip(*partials)
+        return pd.concat(nodes), pd.concat(edges)
@@ -0,0 +1,420 @@
+from opponent_analysis.kpis import KPIs
+from opponent_analysis.preprocessing import Preprocessing
+import numpy as np
+import pandas as pd
+import polars as pl
+
+
+class PolarsPreprocessing(Preprocessing):
+    """Same preprocessing as the pandas implementation. The sorting, the
+    forward fill of the centers and the opponents are done in a lazy polars
+    query, the nested statsbomb columns stay in the pandas dataframe and are
+    only reordered once.
+    """
+
+    def get_center_lists(self, tactics: pd.Series):
+        """Extracts the player ids of the centers from the tactics
+
+        Args:
+            tactics (pd.Series): the tactics column, a dict for starting XI
+              and tactical shift events and missing otherwise
+
+        Returns:
+            list: list of center ids or None for each event
+        """
+        return [
+            (
+                [
+                    player["player"]["id"]
+                    for player in tactic["lineup"]
+                    if 2 < player["position"]["id"] < 6
+                ]
+                if isinstance(tactic, dict)
+                else None
+            )
+            for tactic in tactics
+        ]
+
+    def run_preprocessing(self, df_raw: pd.DataFrame):
+        """Adds the center ids, the opponent and the event time to each
+        event and sorts the events
+
+        Args:
+            df_raw (pd.DataFrame): the raw merged 360 and event data
+
+        Returns:
+            pd.DataFrame: original dataframe sorted and enriched with some
+            information
+        """
+        lf = (
+            pl.from_pandas(
+                df_raw[["match_id", "index", "team", "minute", "second"]]
+            )
+            .with_columns(
+                pl.Series(
+                    "center_id",
+                    self.get_center_lists(df_raw["tactics"]),
+                    dtype=pl.List(pl.Int64),
+                )
+            )
+            .with_row_index("row")
+            .lazy()
+        )
+        teams = lf.select("match_id", "team").unique()
+        opponents = (
+            teams.join(teams, on="match_id", suffix="_opponent")
+            .filter(pl.col("team") != pl.col("team_opponent"))
+            .rename({"team_opponent": "opponent"})
+        )
+        result = (
+            lf.sort("match_id", "team", "index")
+            .with_columns(pl.col("center_id").forward_fill())
+            .with_row_index("level_0")
+            .join(opponents, on=["match_id", "team"], how="left")
+            .sort("match_id", "index")
+            .with_columns(
+                event_time=pl.col("minute") * 60 + pl.col("second"),
+            )
+            .collect()
+        )
+        df_preprocessed = df_raw.iloc[result["row"].to_numpy()].reset_index(
+            drop=True
+        )
+        df_preprocessed.insert(
+            0, "level_0", result["level_0"].cast(pl.Int64).to_numpy()
+        )
+        df_preprocessed["center_id"] = result["center_id"].to_list()
+        df_preprocessed["opponent"] = result["opponent"].to_numpy()
+        df_preprocessed["event_time"] = result["event_time"].to_numpy()
+        return df_preprocessed
+
+
+class PolarsKPIs(KPIs):
+    """Same KPIs as the pandas implementation, calculated by lazy polars
+    queries that are executed together on all cores.
+    """
+
+    def to_lazy_frame(self, df_preprocessed: pd.DataFrame):
+        """Converts the flat columns that are needed for the KPIs to a polars
+        lazy frame. The row is the position in the pandas dataframe.
+
+        Args:
+            df_preprocessed (pd.DataFrame): the preprocessed data frame
+
+        Returns:
+            pl.LazyFrame: flat columns plus the coordinates of the locations
+        """
+        strings = [
+            "team",
+            "opponent",
+            "player",
+            "type",
+            "play_pattern",
+            "shot_outcome",
+            "pass_outcome",
+            "id",
+            "pass_assisted_shot_id",
+        ]
+        numbers = [
+            "match_id",
+            "player_id",
+            "event_time",
+            "duration",
+            "shot_statsbomb_xg",
+        ]
+        df = pl.from_pandas(df_preprocessed[strings + numbers])
+        return (
+            df.with_columns(
+                [pl.col(col).cast(pl.Utf8) for col in strings]
+                + [
+                    pl.Series(
+                        "x", self.get_coordinates(df_preprocessed.location, 0)
+                    ),
+                    pl.Series(
+                        "y", self.get_coordinates(df_preprocessed.location, 1)
+                    ),
+                    pl.Series(
+                        "center_id",
+                        [
+                            c if isinstance(c, list) else None
+                            for c in df_preprocessed["center_id"]
+                        ],
+                        dtype=pl.List(pl.Int64),
+                    ),
+                ]
+            )
+            .with_row_index("row")
+            .lazy()
+        )
+
+    def high_level_kpis_query(self, lf: pl.LazyFrame):
+        """Lazy version of create_high_level_kpis for all matches at once
+
+        Args:
+            lf (pl.LazyFrame): result of to_lazy_frame
+
+        Returns:
+            pl.LazyFrame: high level KPIs for each team and match
+        """
+        is_type = {t: pl.col("type") == t for t in ("Pass", "Shot")}
+        team_stats = lf.group_by("match_id", "team").agg(
+            goals_scored=(pl.col("shot_outcome") == "Goal").sum(),
+            shot_statsbomb_xg_scored=pl.col("shot_statsbomb_xg").sum(),
+            shots=is_type["Shot"].sum(),
+            passes=is_type["Pass"].sum(),
+            completed_passes=(
+                is_type["Pass"] & pl.col("pass_outcome").is_null()
+            ).sum(),
+            interceptions=(pl.col("type") == "Interception").sum(),
+            clearances=(pl.col("type") == "Clearance").sum(),
+            possession_seconds=pl.col("duration")
+            .filter(pl.col("type") != "Pressure")
+            .sum(),
+        )
+        other_team_stats = team_stats.select(
+            "match_id",
+            other_team=pl.col("team"),
+            goals_conceded=pl.col("goals_scored"),
+            shot_statsbomb_xg_conceded=pl.col("shot_statsbomb_xg_scored"),
+            other_possession_seconds=pl.col("possession_seconds"),
+        )
+        return (
+            team_stats.join(other_team_stats, on="match_id")
+            .filter(pl.col("team") != pl.col("other_team"))
+            .select(
+                "match_id",
+                "team",
+                pl.col("goals_scored").cast(pl.Int64),
+                pl.col("goals_conceded").cast(pl.Int64),
+                "shot_statsbomb_xg_scored",
+                "shot_statsbomb_xg_conceded",
+                pl.col("shots").cast(pl.Int64),
+                pl.col("passes").cast(pl.Int64),
+                pass_accuracy=pl.col("completed_passes")
+                / pl.col("passes")
+                * 100,
+                interceptions=pl.col("interceptions").cast(pl.Int64),
+                clearances=pl.col("clearances").cast(pl.Int64),
+                possession=pl.col("possession_seconds")
+                / (
+                    pl.col("other_possession_seconds")
+                    + pl.col("possession_seconds")
+                ),
+            )
+        )
+
+    def center_events_query(self, lf: pl.LazyFrame, tolerance: int):
+        """Lazy version of get_time_delta_from_opponent_goal_kick and
+        get_center_events_after_opponent_goal_kick
+
+        Args:
+            lf (pl.LazyFrame): result of to_lazy_frame
+            tolerance (int): the tolerance after each goalkick in which an
+            event with a center is taken into account as directly after the
+            goal kick
+
+        Returns:
+            pl.LazyFrame: rows, delta to the goal kick and coordinates of the
+            center events directly after the goal kick
+        """
+        goal_kicks = (
+            lf.filter(
+                (
+                    pl.col("play_pattern").shift(1).fill_null("")
+                    != "From Goal Kick"
+                )
+                & (pl.col("play_pattern") == "From Goal Kick")
+            )
+            .select(
+                "match_id",
+                opponent=pl.col("team"),
+                goal_kick_time=pl.col("event_time"),
+            )
+            .sort("goal_kick_time")
+        )
+        return (
+            lf.sort("event_time")
+            .join_asof(
+                goal_kicks,
+                left_on="event_time",
+                right_on="goal_kick_time",
+                by=["match_id", "opponent"],
+                strategy="backward",
+            )
+            .with_columns(
+                delta_goal_kick=(
+                    pl.col("event_time") - pl.col("goal_kick_time")
+                ).cast(pl.Float64)
+            )
+            .filter(
+                pl.col("center_id").list.contains(
+                    pl.col("player_id").cast(pl.Int64)
+                )
+                & (pl.col("delta_goal_kick") < tolerance)
+            )
+            .select("row", "player_id", "delta_goal_kick", "team", "x", "y")
+        )
+
+    def goals_xg_query(self, lf: pl.LazyFrame):
+        """Lazy version of get_goals_xg
+
+        Args:
+            lf (pl.LazyFrame): result of to_lazy_frame
+
+        Returns:
+            pl.LazyFrame: The xgs for each player plus the acctual goals
+        """
+        players = lf.filter(pl.col("player").is_not_null())
+        df_xg = players.group_by("team", "player").agg(
+            pl.col("shot_statsbomb_xg").sum()
+        )
+        df_goals = (
+            players.filter(pl.col("shot_outcome") == "Goal")
+            .group_by("team", "player")
+            .agg(shot_outcome=pl.len().cast(pl.Float64))
+        )
+        return (
+            df_xg.join(df_goals, on=["team", "player"], how="left")
+            .sort("team", "player")
+            .sort(
+                ["team", "shot_outcome", "shot_statsbomb_xg"],
+                descending=True,
+                nulls_last=True,
+                maintain_order=True,
+            )
+            .with_columns(pl.col("shot_outcome").fill_null(0))
+        )
+
+    def assists_to_xg_query(self, lf: pl.LazyFrame):
+        """Lazy version of get_assists_to_xg
+
+        Args:
+            lf (pl.LazyFrame): result of to_lazy_frame
+
+        Returns:
+            pl.LazyFrame: The summed up xgs resulting from an assist of each
+            player
+        """
+        assists = lf.filter(
+            pl.col("pass_assisted_shot_id").is_not_null()
+        ).select(
+            id=pl.col("pass_assisted_shot_id"),
+            player_assisted=pl.col("player"),
+        )
+        return (
+            lf.select("id", "team", "shot_statsbomb_xg")
+            .join(assists, on="id")
+            .group_by("team", "player_assisted")
+            .agg(pl.col("shot_statsbomb_xg").sum())
+            .sort("team", "player_assisted")
+            .sort(
+                ["team", "shot_statsbomb_xg"],
+                descending=True,
+                maintain_order=True,
+            )
+        )
+
+    def passed_opponents_query(
+        self, lf: pl.LazyFrame, df_preprocessed: pd.DataFrame
+    ):  # noqa: E501
+        """Lazy version of get_passed_opponents. The opponents of all
+        freeze frames are flattened into one array and compared with the
+        start and end of the passes at once. The index of the dataframe has
+        to be the position of the row.
+
+        Args:
+            lf (pl.LazyFrame): result of to_lazy_frame
+            df_preprocessed (pd.DataFrame): the preprocessed data frame, which
+              holds the freeze frames
+
+        Returns:
+            pl.LazyFrame: total passed opponents for each player
+        """
+        df_passes = self.get_complete_passes(df_preprocessed)
+        start_x = self.get_coordinates(df_passes["location"], 0)
+        end_x = self.get_coordinates(df_passes["pass_end_location"], 0)
+        pass_nr, opponent_x, _ = self.flatten_opponents(
+            df_passes["freeze_frame"]
+        )
+        is_passed = (start_x[pass_nr] < opponent_x) & (
+            opponent_x < end_x[pass_nr]
+        )
+        passed_opponents = np.bincount(
+            pass_nr[is_passed], minlength=len(df_passes)
+        )
+        df_counts = pl.LazyFrame(
+            {
+                "row": pl.Series(df_passes.index, dtype=pl.UInt32),
+                "passed_opponents": pl.Series(
+                    passed_opponents, dtype=pl.Int64
+                ),
+            }
+        )
+        return (
+            lf.join(df_counts, on="row")
+            .filter(pl.col("player").is_not_null())
+            .group_by("team", "player")
+            .agg(pl.col("passed_opponents").sum())
+            .sort("passed_opponents", descending=True)
+        )
+
+    def run_kpis(self, df_preprocessed: pd.DataFrame):
+        """The KPI queries are built lazily and collected together, so polars
+        runs them in parallel. The results have the same format as the
+        pandas implementation.
+
+        Args:
+            df_preprocessed (pd.DataFrame): event and 360 data preprocessed
+
+        Returns:
+            pd.DataFrame: high level KPIs
+            pd.DataFrame: center position at opponent goal kick
+            pd.DataFrame: xg goals for each player
+            pd.DataFrame: assists to xg for each player
+            pd.DataFrame: passed opponents by a pass for each player
+            pd.DataFrame: broken defensive lines by a pass for each player
+        """
+        df_preprocessed = df_preprocessed.reset_index(drop=True)
+        lf = self.to_lazy_frame(df_preprocessed)
+        (
+            kpis,
+            center_events,
+            goals_xg,
+            assists_to_xg,
+            passed_opponents,
+        ) = pl.collect_all(
+            [
+                self.high_level_kpis_query(lf),
+                self.center_events_query(lf, self.conf.goal_kick_tolerance),
+                self.goals_xg_query(lf),
+                self.assists_to_xg_query(lf),
+                self.passed_opponents_query(lf, df_preprocessed),
+            ]
+        )
+        df_kpis = kpis.to_pandas().set_index(["match_id", "team"])
+        df_kpis.index.names = ["match_id", None]
+        df_center_events = center_events.to_pandas().set_index("row")
+        df_center_events.index.name = None
+        df_center_events.insert(
+            0,
+            "center_id",
+            df_preprocessed["center_id"][df_center_events.index],
+        )
+        df_center_events.insert(
+            2, "location", df_preprocessed["location"][df_center_events.index]
+        )
+        df_goals_xg = goals_xg.to_pandas().set_index(["team", "player"])
+        df_assists_to_xg = assists_to_xg.to_pandas().set_index(
+            ["team", "player_assisted"]
+        )
+        df_passed_opponents = passed_opponents.to_pandas().set_index(
+            ["team", "player"]
+        )["passed_opponents"]
+        return (
+            df_kpis,
+            df_center_events,
+            df_goals_xg,
+            df_assists_to_xg,
+            df_passed_opponents,
+            self.get_broken_lines(df_preprocessed),
+        )
@@ -0,0 +1,104 @@
+from opponent_analysis.config import Config
+import numpy as np
+import pandas as pd
+
+
+class Profiles:
+    """Precomputes the comparison of each team with the tournament for the
+    high level KPIs, so the dashboard only has to look it up.
+    """
+
+    def __init__(
+        self,
+    ):
+        self.conf = Config()
+
+    def add_opponents(self, df_kpis: pd.DataFrame):
+        """Adds the opponent of each match to the high level KPIs
+
+        Args:
+            df_kpis (pd.DataFrame): high level KPIs with match_id and team in
+              the index
+
+        Returns:
+            pd.DataFrame: KPIs with match_id, team and opponent as columns
+        """
+        df = df_kpis.astype(float).rename_axis(["match_id", "team"])
+        df = df.reset_index()
+        df_teams = df[["match_id", "team"]]
+        df_opponents = df_teams.merge(
+            df_teams, on="match_id", suffixes=("", "_opponent")
+        )
+        df_opponents = df_opponents[
+            df_opponents["team"] != df_opponents["team_opponent"]
+        ].rename(columns={"team_opponent": "opponent"})
+        return df.merge(df_opponents, on=["match_id", "team"], how="left")
+
+    def run_profiles(self, df_kpis: pd.DataFrame):
+        """Compares the KPIs of each team with the tournament, once for all
+        matches (opponent "all") and once for the matches against each
+        opponent. A value is classified as good or bad if it is more than the
+        tolerance set in the config times the STD better or worse than the
+        average.
+
+        Args:
+            df_kpis (pd.DataFrame): high level KPIs with match_id and team in
+              the index
+
+        Returns:
+            pd.DataFrame: team value, average, STD, percentile (100 is best),
+            rank among the team averages (1 is best), whether a high value is
+            good and the classification for each team, opponent and KPI. The
+            index is sorted, so the dashboard can look up a team without a
+            scan.
+        """
+        df = self.add_opponents(df_kpis)
+        kpis = list(df_kpis.columns)
+        df_all = df.groupby("team")[kpis].mean()
+        df_split = df.groupby(["team", "opponent"])[kpis].mean()
+        df_values = pd.concat(
+            [
+                df_all.assign(opponent="all").set_index(
+                    "opponent", append=True
+                ),
+                df_split,
+            ]
+        )
+        df_values.columns.name = "kpi"
+        df_profiles = df_values.stack().rename("Team Values").to_frame()
+        kpi = df_profiles.index.get_level_values("kpi")
+        df_profiles["Average"] = df[kpis].mean().reindex(kpi).values
+        df_profiles["STD"] = df[kpis].std().reindex(kpi).values
+        df_profiles["high_is_good"] = (
+            pd.Series(self.conf.kpi_high_is_good).reindex(kpi).fillna(1).values
+        )
+        direction = df_profiles["high_is_good"].values
+        value = direction * df_profiles["Team Values"].values
+        df_profiles["Percentile"] = np.nan
+        df_profiles["Rank"] = 0
+        for name in kpis:
+            mask = kpi == name
+            sign = direction[mask][0]
+            match_values = np.sort(sign * df[name].dropna().values)
+            team_values = np.sort(sign * df_all[name].dropna().values)
+            df_profiles.loc[mask, "Percentile"] = (
+                100
+                * np.searchsorted(match_values, value[mask], side="right")
+                / max(len(match_values), 1)
+            )
+            df_profiles.loc[mask, "Rank"] = (
+                len(team_values)
+                - np.searchsorted(team_values, value[mask], side="right")
+                + 1
+            )
+        tolerance = self.conf.kpi_std_tolerance * df_profiles["STD"].values
+        average = direction * df_profiles["Average"].values
+        df_profiles["classification"] = np.select(
+            [
+                value < average - tolerance,
+                value > average + tolerance,
+            ],
+            ["bad", "good"],
+            "average",
+        )
+        return df_profiles.sort_index()
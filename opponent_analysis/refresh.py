@@ -0,0 +1,291 @@
+from opponent_analysis.artifacts import Artifacts
+from opponent_analysis.backend import Backend
+from opponent_analysis.config import Config
+from opponent_analysis.data import Data
+from opponent_analysis.pass_network import PassNetwork
+from opponent_analysis.profiles import Profiles
+from opponent_analysis.similarity import SimilarityFeatures
+import fcntl
+import logging
+import os
+import pandas as pd
+import threading
+import time
+import traceback
+
+logger = logging.getLogger(__name__)
+
+
+class Refresher:
+    """Rebuilds the dashboard data in a background thread. While the thread
+    is running the dashboard keeps serving the last snapshot. A lock file in
+    the artifacts folder makes sure that only one process on the host
+    rebuilds the data at a time. After a failed refresh the next one is
+    started after refresh_retry_minutes at the earliest.
+    """
+
+    def __init__(
+        self,
+    ):
+        self.conf = Config()
+        self.artifacts = Artifacts()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._status = {
+            "state": "idle",
+            "step": "",
+            "progress": 0.0,
+            "error": None,
+            "failed_at": None,
+        }
+
+    def _set_status(self, **kwargs):
+        with self._lock:
+            self._status.update(kwargs)
+
+    def get_status(self):
+        """Returns a copy of the current status of the refresh
+
+        Returns:
+            dict: state (idle, running, done, failed), the current step, the
+            progress between 0 and 1, the error message and the time of the
+            failure if it failed
+        """
+        with self._lock:
+            return dict(self._status)
+
+    def is_running(self):
+        """Checks whether a refresh is in progress
+
+        Returns:
+            bool: True if the background thread is alive
+        """
+        return self._thread is not None and self._thread.is_alive()
+
+    def _acquire_process_lock(self):
+        """Takes the lock file of the artifacts folder without waiting. The
+        lock is released when the file is closed or the process ends.
+
+        Returns:
+            file: the open lock file or None if another process holds it
+        """
+        path_to_artifacts = self.artifacts.conf.path_to_artifacts
+        os.makedirs(path_to_artifacts, exist_ok=True)
+        lock_file = open(os.path.join(path_to_artifacts, "REFRESH.lock"), "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            return None
+        return lock_file
+
+    def is_running_elsewhere(self):
+        """Checks whether another process is refreshing the data
+
+        Returns:
+            bool: True if the lock file is held by another process
+        """
+        if self.is_running():
+            return False
+        lock_file = self._acquire_process_lock()
+        if lock_file is None:
+            return True
+        lock_file.close()
+        return False
+
+    def start(self):
+        """Starts a refresh in the background unless one is already running
+        in this or another process or the last one failed recently. If
+        another process published a new snapshot in the meantime, nothing is
+        refreshed.
+
+        Returns:
+            bool: True if a new refresh was started
+        """
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return False
+            failed_at = self._status["failed_at"]
+            if (
+                failed_at is not None
+                and time.time() - failed_at
+                < self.conf.refresh_retry_minutes * 60
+            ):
+                return False
+            lock_file = self._acquire_process_lock()
+            if lock_file is None:
+                return False
+            version = self.artifacts.get_current_version()
+            if not self.artifacts.is_outdated(version):
+                lock_file.close()
+                return False
+            self._status.update(
+                state="running",
+                step="",
+                progress=0.0,
+                error=None,
+                failed_at=None,
+            )
+            self._thread = threading.Thread(
+                target=self._run,
+                args=(lock_file,),
+                name="opponent-analysis-refresh",
+                daemon=True,
+            )
+            self._thread.start()
+        return True
+
+    def get_result_tables(
+        self, kpi_results: tuple, df_event_stats, pass_networks: tuple
+    ):  # noqa: E501
+        """Names the results of the KPIs and adds the tables that are derived
+        from them
+
+        Args:
+            kpi_results (tuple): result of run_kpis or reduce_kpis
+            df_event_stats (pd.DataFrame): event stats for the similarity
+              features
+            pass_networks (tuple): result of run_pass_network or
+              reduce_pass_networks
+
+        Returns:
+            dict: dataframes by their name as expected by Artifacts
+        """
+        (
+            df_kpis,
+            df_iv_position_at_opponent_goal_kick,
+            df_goals_xg,
+            df_assists_to_xg,
+            df_passed_opponents,
+            df_broken_lines,
+        ) = kpi_results
+        df_pass_network_nodes, df_pass_network_edges = pass_networks
+        features = SimilarityFeatures()
+        return {
+            "df_kpis": df_kpis,
+            "df_iv_position_at_opponent_goal_kick": (
+                df_iv_position_at_opponent_goal_kick
+            ),
+            "df_goals_xg": df_goals_xg,
+            "df_assists_to_xg": df_assists_to_xg,
+            "df_passed_opponents": df_passed_opponents,
+            "df_broken_lines": df_broken_lines,
+            "df_kpi_profiles": Profiles().run_profiles(df_kpis),
+            "df_team_features": features.get_team_features(
+                df_event_stats,
+                df_kpis,
+                df_iv_position_at_opponent_goal_kick,
+                df_passed_opponents,
+            ),
+            "df_player_features": features.get_player_features(
+                df_event_stats,
+                df_goals_xg,
+                df_assists_to_xg,
+                df_passed_opponents,
+            ),
+            "df_pass_network_nodes": df_pass_network_nodes,
+            "df_pass_network_edges": df_pass_network_edges,
+        }
+
+    def build_tables(self):
+        """Runs the data, preprocessing and kpi pipeline and reports the
+        progress on the way
+
+        Returns:
+            dict: dataframes by their name as expected by Artifacts
+        """
+        self._set_status(step="Lade Statsbomb Daten", progress=0.0)
+        backend = Backend()
+        df_raw = Data().get_data()
+        self._set_status(step="Bereite Daten auf", progress=0.4)
+        df_preprocessed = backend.preprocessing.run_preprocessing(df_raw)
+        self._set_status(step="Berechne KPIs", progress=0.6)
+        df_event_stats = SimilarityFeatures().get_event_stats(df_preprocessed)
+        tables = self.get_result_tables(
+            backend.kpis.run_kpis(df_preprocessed),
+            df_event_stats,
+            PassNetwork().run_pass_network(df_preprocessed),
+        )
+        tables["df_preprocessed"] = df_preprocessed
+        return tables
+
+    def build_snapshot_streaming(self):
+        """Runs the pipeline batch by batch of matches. Each batch is
+        preprocessed, its KPIs are calculated and the preprocessed data is
+        written into the snapshot before the next batch is loaded. Afterwards
+        the KPIs of all batches are combined. The index of the preprocessed
+        data continues from batch to batch, so it is unique like the one of
+        build_tables.
+
+        Returns:
+            str: name of the snapshot, which is not published yet
+        """
+        data = Data()
+        backend = Backend()
+        features = SimilarityFeatures()
+        pass_network = PassNetwork()
+        p = backend.preprocessing
+        kpis = backend.kpis
+        batch_size = self.conf.streaming_batch_size
+        self._set_status(step="Lade Statsbomb Daten", progress=0.0)
+        match_ids = data.get_match_id()
+        n_batches = max(1, -(-len(match_ids) // batch_size))
+        version = self.artifacts.create_snapshot()
+        try:
+            partials = []
+            event_stats = []
+            offset = 0
+            pass_networks = []
+            for i, df_raw in enumerate(
+                data.iter_statsbomb_data(match_ids, batch_size)
+            ):
+                self._set_status(
+                    step=f"Verarbeite Spiele ({i + 1}/{n_batches})",
+                    progress=0.8 * i / n_batches,
+                )
+                df_preprocessed = p.run_preprocessing(df_raw)
+                event_stats.append(features.get_event_stats(df_preprocessed))
+                pass_networks.append(
+                    pass_network.run_pass_network(df_preprocessed)
+                )
+                partials.append(kpis.run_kpis(df_preprocessed))
+                df_preprocessed.index = pd.RangeIndex(
+                    offset, offset + len(df_preprocessed)
+                )
+                offset += len(df_preprocessed)
+                self.artifacts.add_table_part(
+                    version, "df_preprocessed", i, df_preprocessed
+                )
+            self._set_status(step="Berechne KPIs", progress=0.8)
+            tables = self.get_result_tables(
+                kpis.reduce_kpis(partials),
+                features.reduce_event_stats(event_stats),
+                pass_network.reduce_pass_networks(pass_networks),
+            )
+            for name, df in tables.items():
+                self.artifacts.add_table(version, name, df)
+        except Exception:
+            self.artifacts.discard_snapshot(version)
+            raise
+        return version
+
+    def _run(self, lock_file):
+        try:
+            if self.conf.use_streaming:
+                version = self.build_snapshot_streaming()
+                self._set_status(step="Speichere Daten", progress=0.9)
+                self.artifacts.publish_snapshot(version)
+            else:
+                tables = self.build_tables()
+                self._set_status(step="Speichere Daten", progress=0.9)
+                self.artifacts.write_snapshot(tables)
+            self._set_status(state="done", step="", progress=1.0)
+        except Exception as error:
+            logger.exception("Refreshing the dashboard data failed")
+            self._set_status(
+                state="failed",
+                error=traceback.format_exception_only(error)[-1].strip(),
+                failed_at=time.time(),
+            )
+        finally:
+            lock_file.close()
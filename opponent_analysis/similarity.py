@@ -0,0 +1,215 @@
+from opponent_analysis.config import Config
+from opponent_analysis.kpis import KPIs
+import numpy as np
+import pandas as pd
+
+
+class SimilarityFeatures:
+    """Builds the feature vectors of the teams and players from the results
+    of the KPIs and the locations of their events.
+    """
+
+    def __init__(
+        self,
+    ):
+        self.conf = Config()
+
+    def get_event_stats(self, df_preprocessed: pd.DataFrame):
+        """Sums up the events and their coordinates for each player. The sums
+        of several batches of matches can be added up with
+        reduce_event_stats.
+
+        Args:
+            df_preprocessed (pd.DataFrame): preprocessed dataframe with event
+              and 360 data
+
+        Returns:
+            pd.DataFrame: number of events, sum of the x and y coordinates
+            and number of matches for each player. Team is in the index.
+        """
+        kpis = KPIs()
+        df = pd.DataFrame(
+            {
+                "team": df_preprocessed["team"].values,
+                "player": df_preprocessed["player"].values,
+                "match_id": df_preprocessed["match_id"].values,
+                "x": kpis.get_coordinates(df_preprocessed["location"], 0),
+                "y": kpis.get_coordinates(df_preprocessed["location"], 1),
+            }
+        ).dropna(subset=["player", "x", "y"])
+        return df.groupby(["team", "player"]).agg(
+            events=("x", "size"),
+            sum_x=("x", "sum"),
+            sum_y=("y", "sum"),
+            matches=("match_id", "nunique"),
+        )
+
+    def reduce_event_stats(self, partials: list):
+        """Adds up the event stats of several batches of matches
+
+        Args:
+            partials (list): results of get_event_stats
+
+        Returns:
+            pd.DataFrame: event stats for all matches
+        """
+        return pd.concat(partials).groupby(level=["team", "player"]).sum()
+
+    def get_team_features(
+        self,
+        df_event_stats: pd.DataFrame,
+        df_kpis: pd.DataFrame,
+        df_iv_position_at_opponent_goal_kick: pd.DataFrame,
+        df_passed_opponents: pd.Series,
+    ):
+        """Combines the average high level KPIs of each team with the height
+        of its centers at opponent goal kicks, its passed opponents per match
+        and the average x coordinate of its events.
+
+        Args:
+            df_event_stats (pd.DataFrame): result of get_event_stats
+            df_kpis (pd.DataFrame): high level KPIs
+            df_iv_position_at_opponent_goal_kick (pd.DataFrame): center
+              position at opponent goal kick
+            df_passed_opponents (pd.Series): passed opponents for each player
+
+        Returns:
+            pd.DataFrame: feature vector for each team
+        """
+        df_features = df_kpis.astype(float).groupby(level=1).mean()
+        df_features.index.name = "team"
+        matches = df_kpis.groupby(level=1).size()
+        df_features["center_height"] = (
+            df_iv_position_at_opponent_goal_kick.groupby("team")["x"]
+            .mean()
+            .astype(float)
+        )
+        df_features["passed_opponents_per_match"] = (
+            df_passed_opponents.groupby(level="team").sum().astype(float)
+            / matches
+        )
+        df_team_stats = df_event_stats.groupby(level="team").sum()
+        df_features["mean_x"] = (
+            df_team_stats["sum_x"] / df_team_stats["events"]
+        )
+        return df_features
+
+    def get_player_features(
+        self,
+        df_event_stats: pd.DataFrame,
+        df_goals_xg: pd.DataFrame,
+        df_assists_to_xg: pd.DataFrame,
+        df_passed_opponents: pd.Series,
+    ):
+        """Combines the xg, goals, assists to xg and passed opponents per
+        match of each player with the number of events per match and the
+        average location of the events.
+
+        Args:
+            df_event_stats (pd.DataFrame): result of get_event_stats
+            df_goals_xg (pd.DataFrame): xg and goals for each player
+            df_assists_to_xg (pd.DataFrame): assists to xg for each player
+            df_passed_opponents (pd.Series): passed opponents for each player
+
+        Returns:
+            pd.DataFrame: feature vector for each player. Team is in the
+            index.
+        """
+        index = df_event_stats.index
+        matches = df_event_stats["matches"]
+        df_assists_to_xg = df_assists_to_xg.rename_axis(["team", "player"])
+        df_features = pd.DataFrame(
+            {
+                "xg": df_goals_xg.iloc[:, 0],
+                "goals": df_goals_xg.iloc[:, 1],
+                "assists_to_xg": df_assists_to_xg.iloc[:, 0],
+                "passed_opponents": df_passed_opponents,
+            }
+        )
+        df_features = (
+            df_features.reindex(index).astype(float).fillna(0).div(matches, 0)
+        )
+        df_features["events"] = df_event_stats["events"] / matches
+        df_features["mean_x"] = (
+            df_event_stats["sum_x"] / df_event_stats["events"]
+        )
+        df_features["mean_y"] = (
+            df_event_stats["sum_y"] / df_event_stats["events"]
+        )
+        return df_features
+
+
+class SimilarityIndex:
+    """Nearest neighbour index over feature vectors. The features are
+    standardized and the vectors normalized, so the dot product is the
+    cosine similarity. The search is brute force and vectorized, an
+    approximate index can replace it by overriding search. The index is
+    built once per snapshot, for a brute force index that is as cheap as
+    updating it.
+    """
+
+    def __init__(
+        self,
+    ):
+        self.conf = Config()
+        self.features = pd.DataFrame()
+        self.vectors = np.empty((0, 0))
+
+    def build(self, df_features: pd.DataFrame):
+        """Builds the index from scratch
+
+        Args:
+            df_features (pd.DataFrame): one feature vector for each entity,
+              the entity is the index
+        """
+        self.features = df_features.astype(float)
+        self.normalize()
+
+    def normalize(self):
+        """Standardizes the features, missing values are set to the average,
+        and normalizes the vectors to unit length.
+        """
+        values = self.features.values
+        mean = np.nanmean(values, axis=0)
+        std = np.nanstd(values, axis=0)
+        std[~(std > 0)] = 1
+        vectors = np.nan_to_num((values - mean) / std)
+        norm = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norm[norm == 0] = 1
+        self.vectors = vectors / norm
+
+    def search(self, vector: np.ndarray, k: int):
+        """Finds the k most similar vectors
+
+        Args:
+            vector (np.ndarray): normalized query vector
+            k (int): number of neighbours
+
+        Returns:
+            np.ndarray: positions of the neighbours, most similar first
+            np.ndarray: cosine similarity of the neighbours
+        """
+        scores = self.vectors @ vector
+        k = min(k, len(scores))
+        nearest = np.argpartition(-scores, k - 1)[:k]
+        nearest = nearest[np.argsort(-scores[nearest])]
+        return nearest, scores[nearest]
+
+    def query(self, name, k: int = 5):
+        """Finds the entities that are most similar to the given one
+
+        Args:
+            name: index of the entity, e.g. the team or (team, player)
+            k (int): number of similar entities
+
+        Returns:
+            pd.Series: cosine similarity of the k most similar entities
+        """
+        position = self.features.index.get_loc(name)
+        nearest, scores = self.search(self.vectors[position], k + 1)
+        keep = nearest != position
+        return pd.Series(
+            scores[keep][:k],
+            index=self.features.index[nearest[keep][:k]],
+            name="similarity",
+        )
@@ -1,21 +1,22 @@
 import pandas as pd
 import streamlit as st
-import matplotlib.pyplot as plt
-import matplotlib.backends.backend_pdf
-from mplsoccer import Pitch
 import numpy as np
 from io import BytesIO
 import base64
-from opponent_analysis.preprocessing import Preprocessing
-from opponent_analysis.data import Data
-from opponent_analysis.kpis import KPIs
+from opponent_analysis.artifacts import Artifacts
+from opponent_analysis.refresh import Refresher
 from opponent_analysis.config import Config
-import os
+from opponent_analysis.similarity import SimilarityIndex
+import time
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import matplotlib.figure
 
 conf = Config()
 
 
-def fig_to_pdf_base64(fig: matplotlib.figure.Figure):
+def fig_to_pdf_base64(fig: "matplotlib.figure.Figure"):
     """Function for downloading figures from app
 
     Args:
@@ -24,6 +25,8 @@ def fig_to_pdf_base64(fig: matplotlib.figure.Figure):
     Returns:
         str: binary data of the PDF file that is base64
     """
+    import matplotlib.backends.backend_pdf
+
     pdf_buffer = BytesIO()
     pdf = matplotlib.backends.backend_pdf.PdfPages(
         pdf_buffer, keep_empty=False
@@ -34,31 +37,26 @@ def fig_to_pdf_base64(fig: matplotlib.figure.Figure):
     return pdf_base64
 
 
-def color_cells(row: pd.Series):
-    """returns the color of the cell of the dataframe to indicate whether the
-    KPI is over or under or within the average.
+def color_classification(df: pd.DataFrame, classification: pd.Series):
+    """returns the color of the cells of the KPI profile to indicate whether
+    the KPI is over or under or within the average. The classification is
+    precomputed, so the colors are only looked up.
 
     Args:
-        row (pd.Series): kpi with std, mean, and a column that indicates
-          whether a high value is good or not
+        df (pd.DataFrame): kpi profile that is displayed
+        classification (pd.Series): good, bad or average for each kpi
 
     Returns:
-        str: color for the row
+        pd.DataFrame: color for each cell
     """
-    cell_color = []
-    for val in row:
-        if row["high_is_good"] * row["Team Values"] < row["high_is_good"] * (
-            row["Average"] - 0.25 * row["STD"]
-        ):
-            color = "red"
-        elif row["high_is_good"] * row["Team Values"] > row["high_is_good"] * (
-            row["Average"] + 0.25 * row["STD"]
-        ):
-            color = "green"
-        else:
-            color = "orange"
-        cell_color.append(f"color: {color}")
-    return cell_color
+    colors = classification.map(
+        {"good": "green", "bad": "red", "average": "orange"}
+    ).astype(str)
+    return pd.DataFrame(
+        np.repeat(("color: " + colors).values[:, None], df.shape[1], axis=1),
+        index=df.index,
+        columns=df.columns,
+    )
 
 
 def create_pass_analysis(filtered_data: pd.DataFrame):
@@ -73,19 +71,22 @@ def create_pass_analysis(filtered_data: pd.DataFrame):
         matplotlib.figure.Figure: figure of a pitch with passes plotted as
           vectors
     """
+    import matplotlib.pyplot as plt
+    from mplsoccer import Pitch
+
     fig, ax = plt.subplots(figsize=(10, 6), tight_layout=True)
     pitch = Pitch(pitch_type="statsbomb", line_zorder=2)
 
     pitch.draw(ax=ax)
 
     for idx, row in filtered_data.iterrows():
-        if not isinstance(row["pass_outcome"], float):
+        if pd.notna(row["pass_outcome"]):
             color = "red"
             width = 0.5
-        elif not isinstance(row["pass_shot_assist"], float):
+        elif pd.notna(row["pass_shot_assist"]):
             color = "silver"
             width = 1
-        elif not isinstance(row["pass_goal_assist"], float):
+        elif pd.notna(row["pass_goal_assist"]):
             color = "gold"
             width = 2
         else:
@@ -106,6 +107,65 @@ def create_pass_analysis(filtered_data: pd.DataFrame):
     return fig
 
 
+def create_pass_network_analysis(
+    df_nodes: pd.DataFrame, df_edges: pd.DataFrame
+):  # noqa: E501
+    """Plots the pass network of one team in one match on the pitch. The
+    players are drawn at their average location, the size shows the
+    betweenness and the width of a line the number of passes.
+
+    Args:
+        df_nodes (pd.DataFrame): metrics of the players of the network
+        df_edges (pd.DataFrame): passes between the players of the network
+
+    Returns:
+        matplotlib.figure.Figure: figure of a pitch with the pass network
+    """
+    import matplotlib.pyplot as plt
+    from mplsoccer import Pitch
+
+    fig, ax = plt.subplots(figsize=(10, 6), tight_layout=True)
+    pitch = Pitch(pitch_type="statsbomb", line_zorder=2)
+    pitch.draw(ax=ax)
+
+    df_nodes = df_nodes.droplevel(["match_id", "team"])
+    df_edges = df_edges.droplevel(["match_id", "team"])
+    df_edges = df_edges[df_edges["passes"] >= conf.pass_network_min_passes]
+    passers = df_nodes.reindex(df_edges.index.get_level_values("passer"))
+    recipients = df_nodes.reindex(df_edges.index.get_level_values("recipient"))
+    pitch.lines(
+        passers["x"].astype(float),
+        passers["y"].astype(float),
+        recipients["x"].astype(float),
+        recipients["y"].astype(float),
+        lw=df_edges["passes"].astype(float) / 2,
+        color="blue",
+        alpha=0.5,
+        zorder=3,
+        ax=ax,
+    )
+    pitch.scatter(
+        df_nodes["x"].astype(float),
+        df_nodes["y"].astype(float),
+        s=200 + 2000 * df_nodes["betweenness"].astype(float),
+        color="white",
+        edgecolors="black",
+        zorder=4,
+        ax=ax,
+    )
+    for player, row in df_nodes.iterrows():
+        pitch.annotate(
+            player,
+            xy=(row["x"], row["y"]),
+            va="center",
+            ha="center",
+            fontsize=8,
+            zorder=5,
+            ax=ax,
+        )
+    return fig
+
+
 def create_high_of_center_analysis(df: pd.DataFrame, team: str):
     """To identify the hight of the centers at the moment at which the opponent
       team has a goal kick. Therefore goal kicks are
@@ -126,6 +186,9 @@ def create_high_of_center_analysis(df: pd.DataFrame, team: str):
     """
     if len(df[df.team == team]) == 0:
         return None, None, None
+    import matplotlib.pyplot as plt
+    from mplsoccer import Pitch
+
     fig, ax = plt.subplots(figsize=(10, 6), tight_layout=True)
     pitch = Pitch(pitch_type="statsbomb", line_zorder=2)
     pitch.draw(ax=ax)
@@ -165,9 +228,26 @@ def create_high_of_center_analysis(df: pd.DataFrame, team: str):
     return fig, average_coord, average_tot
 
 
-@st.cache_data
-def run_code():
-    """Calculates all nesseccary dataframes for the tables and figure
+@st.cache_resource
+def get_refresher():
+    """One refresher per process that is shared by all sessions
+
+    Returns:
+        Refresher: background refresh of the dashboard data
+    """
+    return Refresher()
+
+
+@st.cache_resource(max_entries=conf.artifacts_to_keep)
+def run_code(version: str):
+    """Reads all nesseccary dataframes for the tables and figure from the
+    snapshot. The version is part of the cache key, so a new snapshot is
+    picked up as soon as the background refresh swapped it in. The
+    dataframes are memory mapped and shared by all sessions, so they must
+    not be modified.
+
+    Args:
+        version (str): name of the snapshot
 
     Returns:
         pd.DataFrame: standard KPIs like xg or pass accuracy
@@ -177,188 +257,350 @@ def run_code():
         pd.DataFrame: the complete preprocced dataframe
         pd.DataFrame: dataframe with the total number of passed by opponents
                     by passing
+        pd.DataFrame: KPI profile of each team compared to the tournament
+        pd.DataFrame: broken defensive lines by passing for each player, None
+                    for old snapshots
+        pd.DataFrame: metrics of the players in the pass network of each
+                    match, None for old snapshots
+        pd.DataFrame: passes between the players in the pass network of each
+                    match, None for old snapshots
+        pd.DataFrame: feature vector of each team, None for old snapshots
+        pd.DataFrame: feature vector of each player, None for old snapshots
     """
-    csv_file = "df_preprocessed_1.csv"
-    if not os.path.exists(csv_file):
-        data = Data()
-        df_raw = data.get_data()
-        p = Preprocessing()
-        df_preprocessed = p.run_preprocessing(df_raw)
-        kpis = KPIs()
-        (
-            df_kpis,
-            df_iv_position_at_opponent_goal_kick,
-            df_goals_xg,
-            df_assists_to_xg,
-            df_passed_opponents,
-        ) = kpis.run_kpis(df_preprocessed)
-        df_kpis.to_csv("df_kpis.csv")
-        df_iv_position_at_opponent_goal_kick.to_csv(
-            "df_iv_position_at_opponent_goal_kick.csv"
-        )
-        df_goals_xg.to_csv("df_goals_xg.csv")
-        half_len_prepro = int(len(df_preprocessed) / 2)
-        df_preprocessed[:half_len_prepro].to_csv("df_preprocessed_1.csv")
-        df_preprocessed[half_len_prepro:].to_csv("df_preprocessed_2.csv")
-        df_assists_to_xg.to_csv("df_assists_to_xg.csv")
-        df_passed_opponents.to_csv("df_passed_opponents.csv")
-    else:
-        df_kpis = pd.read_csv("df_kpis.csv", index_col=[0, 1])
-        df_iv_position_at_opponent_goal_kick = pd.read_csv(
-            "df_iv_position_at_opponent_goal_kick.csv", index_col=0
-        )
-        df_goals_xg = pd.read_csv("df_goals_xg.csv", index_col=[0, 1])
-        df_preprocessed_1 = pd.read_csv("df_preprocessed_1.csv", index_col=0)
-        df_preprocessed_2 = pd.read_csv("df_preprocessed_2.csv", index_col=0)
-        df_preprocessed = pd.concat([df_preprocessed_1, df_preprocessed_2])
-        df_assists_to_xg = pd.read_csv(
-            "df_assists_to_xg.csv", index_col=[0, 1]
-        )  # noqa: E501
-        df_passed_opponents = pd.read_csv(
-            "df_passed_opponents.csv", index_col=[0, 1]
-        )  # noqa: E501
+    tables = Artifacts().read_snapshot(version)
     return (
+        tables["df_kpis"],
+        tables["df_iv_position_at_opponent_goal_kick"],
+        tables["df_goals_xg"],
+        tables["df_assists_to_xg"],
+        tables["df_preprocessed"],
+        tables["df_passed_opponents"],
+        tables["df_kpi_profiles"],
+        tables["df_broken_lines"],
+        tables["df_pass_network_nodes"],
+        tables["df_pass_network_edges"],
+        tables["df_team_features"],
+        tables["df_player_features"],
+    )  # noqa: E501
+
+
+@st.cache_resource(max_entries=conf.artifacts_to_keep)
+def get_similarity_indexes(version: str):
+    """Builds the similarity indexes of the teams and players once per
+    snapshot
+
+    Args:
+        version (str): name of the snapshot
+
+    Returns:
+        SimilarityIndex: index of the teams, None if the snapshot has no
+          features
+        SimilarityIndex: index of the players, None if the snapshot has no
+          features
+    """
+    indexes = []
+    for df_features in run_code(version)[-2:]:
+        if df_features is None:
+            indexes.append(None)
+            continue
+        index = SimilarityIndex()
+        index.build(df_features)
+        indexes.append(index)
+    return tuple(indexes)
+
+
+def show_refresh_status(refresher: Refresher, wait: bool):
+    """Shows the progress of the background refresh. A failed refresh is
+    only mentioned, the error is logged by the refresher.
+
+    Args:
+        refresher (Refresher): the refresher of this process
+        wait (bool): if there is no snapshot to serve yet, the progress is
+          updated until the refresh is finished and the page is reloaded
+    """
+    if wait and refresher.is_running_elsewhere():
+        with st.spinner("Die Daten werden von einem anderen Prozess geladen"):
+            while refresher.is_running_elsewhere():
+                time.sleep(1)
+        st.rerun()
+    status = refresher.get_status()
+    if status["state"] == "failed":
+        if wait:
+            st.error(
+                "Die Daten konnten nicht geladen werden, es wird später "
+                + "erneut versucht."
+            )
+        else:
+            st.caption(
+                "Die Daten sind älter als erwartet, die Aktualisierung wird "
+                + "später erneut versucht."
+            )
+        return
+    if not refresher.is_running():
+        return
+    if not wait:
+        st.caption(
+            "Die Daten werden im Hintergrund aktualisiert "
+            + f"({status['step']}, {int(status['progress'] * 100)}%)."
+        )
+        return
+    progress_bar = st.progress(status["progress"], text=status["step"])
+    while refresher.is_running():
+        time.sleep(1)
+        status = refresher.get_status()
+        progress_bar.progress(status["progress"], text=status["step"])
+    st.rerun()
+
+
+def load_snapshot(artifacts: Artifacts, attempts: int = 3):
+    """Reads the current snapshot. A refresh of another process can remove
+    the snapshot between reading the pointer file and reading the tables,
+    then the pointer file is read again.
+
+    Args:
+        artifacts (Artifacts): the artifacts
+        attempts (int): how often the pointer file is read
+
+    Returns:
+        str: name of the current snapshot, None if there is none yet
+        bool: True if the snapshot has to be refreshed
+        tuple: the tables of run_code, None if there is no snapshot
+    """
+    for attempt in range(attempts):
+        version = artifacts.get_current_version()
+        try:
+            outdated = artifacts.is_outdated(version)
+            if version is None:
+                return version, outdated, None
+            return version, outdated, run_code(version)
+        except FileNotFoundError:
+            if attempt == attempts - 1:
+                raise
+
+
+def main():
+    """Renders the dashboard. The data is read from the current snapshot, if
+    there is none yet the progress of the refresh is shown instead.
+    """
+    artifacts = Artifacts()
+    refresher = get_refresher()
+    version, outdated, tables = load_snapshot(artifacts)
+    if outdated:
+        refresher.start()
+    show_refresh_status(refresher, wait=version is None)
+    if version is None:
+        st.stop()
+
+    (
         df_kpis,
         df_iv_position_at_opponent_goal_kick,
         df_goals_xg,
         df_assists_to_xg,
         df_preprocessed,
         df_passed_opponents,
-    )  # noqa: E501
+        df_kpi_profiles,
+        df_broken_lines,
+        df_pass_network_nodes,
+        df_pass_network_edges,
+        _,
+        _,
+    ) = tables
+    team_index, player_index = get_similarity_indexes(version)
+
+    st.title("Gegner Analyse")
+    selected_team = st.selectbox(
+        "Wähle ein Team", df_kpis.index.get_level_values(1).unique()
+    )
+    df_team_profile = df_kpi_profiles.xs(selected_team, level="team")
+    opponents = df_team_profile.index.get_level_values("opponent").unique()
+    kpi_opponent = st.selectbox(
+        f"Vergleiche die KPIs von {selected_team} in den Spielen gegen",
+        ["all", *sorted(opponents.drop("all"))],
+    )
+    result_df = df_team_profile.xs(kpi_opponent, level="opponent")
+    styled_result_df = result_df[
+        ["Team Values", "Average", "STD", "Percentile", "Rank"]
+    ].style.apply(
+        color_classification,
+        axis=None,
+        classification=result_df["classification"],
+    )
+    st.write(f"High level KPIs für {selected_team}:")
+    st.write(styled_result_df)
+    if team_index is not None:
+        st.write(f"Teams, die ähnlich spielen wie {selected_team}:")
+        st.write(team_index.query(selected_team, k=3))
 
+    st.write("Die erziehlten Tore im Vergleich zu den xg pro Spielerin")
+    st.write(
+        df_goals_xg[
+            df_goals_xg.index.get_level_values("team") == selected_team
+        ].set_axis(["xg", "goals"], axis=1)
+    )  # noqa: E501
 
-(
-    df_kpis,
-    df_iv_position_at_opponent_goal_kick,
-    df_goals_xg,
-    df_assists_to_xg,
-    df_preprocessed,
-    df_passed_opponents,
-) = run_code()
-
-
-st.title("Gegner Analyse")
-selected_team = st.selectbox(
-    "Wähle ein Team", df_kpis.index.get_level_values(1).unique()
-)
-team_stats = df_kpis.xs(selected_team, level=1).mean()
-average = df_kpis.mean()
-std_dev = df_kpis.std()
-high_is_good = [1, -1, 1, -1, 1, 1, 1, 1, 1, 1]
-result_df = pd.DataFrame(
-    {
-        "Team Values": team_stats,
-        "Average": average,
-        "STD": std_dev,
-        "high_is_good": high_is_good,
-    }
-)
-styled_result_df = result_df.style.apply(color_cells, axis=1)
-st.write(f"High level KPIs für {selected_team}:")
-st.write(styled_result_df)
-
-st.write("Die erziehlten Tore im Vergleich zu den xg pro Spielerin")
-df_goals_xg.columns = ["xg", "goals"]
-st.write(
-    df_goals_xg[df_goals_xg.index.get_level_values("team") == selected_team]
-)  # noqa: E501
-
-st.write(
-    "Die Summe der XGs die durch Pässe der jeweiligen Spielerin entstanden sind"  # noqa: E501
-)  # noqa: E501
-df_assists_to_xg.columns = ["pass_leading_to_xg"]
-st.write(
-    df_assists_to_xg[
-        df_assists_to_xg.index.get_level_values("team") == selected_team
-    ]  # noqa: E501
-)
-
-opponent_filter = st.selectbox(
-    f"Wähle ein Gegener von {selected_team}",
-    np.append(
-        df_preprocessed[df_preprocessed["team"] == selected_team][
-            "opponent"
-        ].unique(),  # noqa: E501
-        np.array(["all"]),
-    ),
-)
-if opponent_filter != "all":
-    player_filter = st.selectbox(
-        "Wähle eine Spielerin",
-        np.append(
-            df_preprocessed[
-                (df_preprocessed["team"] == selected_team)
-                & (df_preprocessed["opponent"] == opponent_filter)
-            ]["player"].unique(),
-            np.array(["all"]),
-        ),
+    st.write(
+        "Die Summe der XGs die durch Pässe der jeweiligen Spielerin entstanden sind"  # noqa: E501
+    )  # noqa: E501
+    st.write(
+        df_assists_to_xg[
+            df_assists_to_xg.index.get_level_values("team") == selected_team
+        ].set_axis(
+            ["pass_leading_to_xg"], axis=1
+        )  # noqa: E501
     )
-else:
-    player_filter = st.selectbox(
-        "Select Player",
+
+    opponent_filter = st.selectbox(
+        f"Wähle ein Gegener von {selected_team}",
         np.append(
-            df_preprocessed[(df_preprocessed["team"] == selected_team)][
-                "player"
-            ].unique(),
+            df_preprocessed[df_preprocessed["team"] == selected_team][
+                "opponent"
+            ]
+            .dropna()
+            .unique(),  # noqa: E501
             np.array(["all"]),
         ),
     )
-filtered_data = df_preprocessed[(df_preprocessed["team"] == selected_team)]
-if opponent_filter != "all":
+    if opponent_filter != "all":
+        player_filter = st.selectbox(
+            "Wähle eine Spielerin",
+            np.append(
+                df_preprocessed[
+                    (df_preprocessed["team"] == selected_team)
+                    & (df_preprocessed["opponent"] == opponent_filter)
+                ]["player"]
+                .dropna()
+                .unique(),
+                np.array(["all"]),
+            ),
+        )
+    else:
+        player_filter = st.selectbox(
+            "Select Player",
+            np.append(
+                df_preprocessed[(df_preprocessed["team"] == selected_team)][
+                    "player"
+                ]
+                .dropna()
+                .unique(),
+                np.array(["all"]),
+            ),
+        )
+    if (
+        player_index is not None
+        and (selected_team, player_filter) in player_index.features.index
+    ):
+        st.write(f"Spielerinnen mit ähnlichem Profil wie {player_filter}:")
+        st.write(player_index.query((selected_team, player_filter), k=5))
+    filtered_data = df_preprocessed[(df_preprocessed["team"] == selected_team)]
+    if opponent_filter != "all":
+        filtered_data = filtered_data[
+            (filtered_data["opponent"] == opponent_filter)
+        ]  # noqa: E501
+    if player_filter != "all":
+        filtered_data = filtered_data[
+            (filtered_data["player"] == player_filter)
+        ]
     filtered_data = filtered_data[
-        (filtered_data["opponent"] == opponent_filter)
-    ]  # noqa: E501
-if player_filter != "all":
-    filtered_data = filtered_data[(filtered_data["player"] == player_filter)]
-filtered_data = filtered_data[
-    [
-        "location",
-        "pass_end_location",
-        "team",
-        "match_id",
-        "player",
-        "pass_outcome",
-        "pass_goal_assist",
-        "pass_shot_assist",
-    ]
-].dropna(subset=["location", "pass_end_location"])
-
-st.write(
-    f"Alle Pässe von {player_filter} in dem Spiel gegen {opponent_filter}. "
-    + "Angekommenen Pässe sind blau, nicht angekomme Pässe sind rot. "
-    + "Pässe die zu einem Torschuss geführt haben sind silber, Schüsse die zu einem Tor geführt haben sind golden."  # noqa: E501
-)
-fig = create_pass_analysis(filtered_data)
-st.pyplot(fig)
-pdf_base64 = fig_to_pdf_base64(fig)
-pdf_href = f'<a href="data:file/pdf;base64,{pdf_base64}" download="plot.pdf">Download PDF</a>'  # noqa: E501
-st.markdown(pdf_href, unsafe_allow_html=True)
-st.write(
-    "Hier ist die Anzahl der überspielten Gegner in Summe pro Spielerin aufgelistet. Es werden nur angekommene Pässe berücksichtigt."  # noqa: E501
-)
-st.write(
-    df_passed_opponents[
-        df_passed_opponents.index.get_level_values("team") == selected_team
-    ]
-)
-
-fig, average_coord, average_tot = create_high_of_center_analysis(
-    df=df_iv_position_at_opponent_goal_kick, team=selected_team
-)
-st.write(
-    "Hier sind die Events mit IV Beteiligung direkt nach einem Abstoß durch"
-    + f"rote Punkte dargestellt (innerhalb {conf.goal_kick_tolerance}s)"
-)
-if fig:
-    st.pyplot(fig)
+        [
+            "location",
+            "pass_end_location",
+            "team",
+            "match_id",
+            "player",
+            "pass_outcome",
+            "pass_goal_assist",
+            "pass_shot_assist",
+        ]
+    ].dropna(subset=["location", "pass_end_location"])
+
     st.write(
-        "Aus den events wurde für {selected_team} eine durchschnittliche"
-        + f"Distanz zum eigen Torauslinie von {np.round(average_coord,1)} "
-        + "yards bestimmt, blaue Linie. \n Der Durchschnitt im Turnier "
-        + f"beträgt {np.round(average_tot,1)} yards (schwarze Linie)."  # noqa: E501
+        f"Alle Pässe von {player_filter} in dem Spiel gegen {opponent_filter}. "  # noqa: E501
+        + "Angekommenen Pässe sind blau, nicht angekomme Pässe sind rot. "
+        + "Pässe die zu einem Torschuss geführt haben sind silber, Schüsse die zu einem Tor geführt haben sind golden."  # noqa: E501
     )
+    fig = create_pass_analysis(filtered_data)
+    st.pyplot(fig)
     pdf_base64 = fig_to_pdf_base64(fig)
     pdf_href = f'<a href="data:file/pdf;base64,{pdf_base64}" download="plot.pdf">Download PDF</a>'  # noqa: E501
     st.markdown(pdf_href, unsafe_allow_html=True)
-else:
-    st.write(f"Keine Events gefunden für {selected_team}.")
+    if df_pass_network_nodes is not None and opponent_filter != "all":
+        st.write(
+            f"Das Passnetzwerk von {selected_team} gegen {opponent_filter}. "
+            + "Die Spielerinnen stehen an ihrer durchschnittlichen Position, je größer der Kreis desto öfter läuft das Passspiel über sie (Betweenness). "  # noqa: E501
+            + f"Verbindungen mit mindestens {conf.pass_network_min_passes} Pässen sind eingezeichnet."  # noqa: E501
+        )
+        match_ids = df_preprocessed[
+            (df_preprocessed["team"] == selected_team)
+            & (df_preprocessed["opponent"] == opponent_filter)
+        ]["match_id"].unique()
+        for match_id in match_ids:
+            key = (match_id, selected_team)
+            if key not in df_pass_network_nodes.index.droplevel("player"):
+                continue
+            df_nodes = df_pass_network_nodes.xs(
+                key, level=["match_id", "team"], drop_level=False
+            )
+            st.pyplot(
+                create_pass_network_analysis(
+                    df_nodes,
+                    df_pass_network_edges.xs(
+                        key, level=["match_id", "team"], drop_level=False
+                    ),
+                )
+            )
+            st.write(
+                df_nodes.droplevel(["match_id", "team"])[
+                    [
+                        "passes",
+                        "receptions",
+                        "degree_centrality",
+                        "closeness",
+                        "betweenness",
+                    ]
+                ].sort_values("betweenness", ascending=False)
+            )
+    st.write(
+        "Hier ist die Anzahl der überspielten Gegner in Summe pro Spielerin aufgelistet. Es werden nur angekommene Pässe berücksichtigt."  # noqa: E501
+    )
+    st.write(
+        df_passed_opponents[
+            df_passed_opponents.index.get_level_values("team") == selected_team
+        ]
+    )
+    if df_broken_lines is not None:
+        st.write(
+            "Hier ist die Anzahl der überspielten Verteidigungslinien in Summe pro Spielerin aufgelistet. "  # noqa: E501
+            + "Eine Linie sind mindestens "
+            + f"{conf.line_min_players} Gegnerinnen mit höchstens "
+            + f"{conf.line_max_gap} yards Abstand, der Pass muss vor der Linie starten und hinter ihr ankommen."  # noqa: E501
+        )
+        st.write(
+            df_broken_lines[
+                df_broken_lines.index.get_level_values("team") == selected_team
+            ]
+        )
+
+    fig, average_coord, average_tot = create_high_of_center_analysis(
+        df=df_iv_position_at_opponent_goal_kick, team=selected_team
+    )
+    st.write(
+        "Hier sind die Events mit IV Beteiligung direkt nach einem Abstoß durch"  # noqa: E501
+        + f"rote Punkte dargestellt (innerhalb {conf.goal_kick_tolerance}s)"
+    )
+    if fig:
+        st.pyplot(fig)
+        st.write(
+            "Aus den events wurde für {selected_team} eine durchschnittliche"
+            + f"Distanz zum eigen Torauslinie von {np.round(average_coord,1)} "
+            + "yards bestimmt, blaue Linie. \n Der Durchschnitt im Turnier "
+            + f"beträgt {np.round(average_tot,1)} yards (schwarze Linie)."  # noqa: E501
+        )
+        pdf_base64 = fig_to_pdf_base64(fig)
+        pdf_href = f'<a href="data:file/pdf;base64,{pdf_base64}" download="plot.pdf">Download PDF</a>'  # noqa: E501
+        st.markdown(pdf_href, unsafe_allow_html=True)
+    else:
+        st.write(f"Keine Events gefunden für {selected_team}.")
+
+
+if __name__ == "__main__":
+    main()
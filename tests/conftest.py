@@ -0,0 +1,132 @@
+import numpy as np
+import pandas as pd
+import pytest
+from opponent_analysis.profiles import Profiles
+
+
+def create_match(match_id: int, teams: list, rng: np.random.Generator):
+    """Creates random event and 360 data of one match in the format of the
+    merged statsbomb data
+    """
+    rows = []
+    for team in teams:
+        team_nr = ord(team[0]) - ord("A") + 1
+        rows.append(
+            {
+                "team": team,
+                "type": "Starting XI",
+                "minute": 0,
+                "second": 0,
+                "tactics": {
+                    "lineup": [
+                        {
+                            "position": {"id": position},
+                            "player": {"id": 100 * team_nr + position},
+                        }
+                        for position in range(1, 12)
+                    ]
+                },
+            }
+        )
+    for i in range(300):
+        team = teams[rng.integers(2)]
+        team_nr = ord(team[0]) - ord("A") + 1
+        position = int(rng.integers(1, 12))
+        event_type = rng.choice(
+            ["Pass", "Pass", "Pass", "Shot", "Pressure", "Clearance"]
+        )
+        row = {
+            "team": team,
+            "type": event_type,
+            "minute": i // 30,
+            "second": (i * 2) % 60,
+            "player": f"{team[0]}{position}",
+            "player_id": float(100 * team_nr + position),
+            "location": [rng.uniform(0, 120), rng.uniform(0, 80)],
+            "duration": rng.uniform(0, 3),
+            "play_pattern": rng.choice(["Regular Play", "From Goal Kick"]),
+        }
+        if event_type == "Pass":
+            row["pass_end_location"] = [
+                rng.uniform(0, 120),
+                rng.uniform(0, 80),
+            ]
+            if rng.random() < 0.2:
+                row["pass_outcome"] = "Incomplete"
+            else:
+                row["pass_recipient"] = f"{team[0]}{rng.integers(1, 12)}"
+            row["freeze_frame"] = [
+                {
+                    "teammate": bool(rng.random() < 0.5),
+                    "actor": False,
+                    "keeper": player == 0,
+                    "location": [rng.uniform(0, 120), rng.uniform(0, 80)],
+                }
+                for player in range(rng.integers(5, 20))
+            ]
+        if event_type == "Shot":
+            row["shot_statsbomb_xg"] = rng.uniform(0, 0.5)
+            row["shot_outcome"] = "Goal" if rng.random() < 0.3 else "Saved"
+        rows.append(row)
+    df = pd.DataFrame(rows)
+    df["index"] = np.arange(1, len(df) + 1)
+    df["match_id"] = match_id
+    df["id"] = [f"{match_id}-{i}" for i in range(len(df))]
+    df["timestamp"] = "00:00:00.000"
+    df["pass_assisted_shot_id"] = None
+    df["pass_shot_assist"] = np.nan
+    df["pass_goal_assist"] = np.nan
+    for shot in df.index[df["type"] == "Shot"]:
+        passes = df.index[
+            (df.index < shot)
+            & (df["type"] == "Pass")
+            & (df["team"] == df.loc[shot, "team"])
+            & df["pass_outcome"].isnull()
+        ]
+        if len(passes) > 0:
+            df.loc[passes[-1], "pass_assisted_shot_id"] = df.loc[shot, "id"]
+            df.loc[passes[-1], "pass_shot_assist"] = True
+    return df
+
+
+@pytest.fixture
+def df_raw():
+    """Random merged event and 360 data of three matches between four
+    teams
+    """
+    rng = np.random.default_rng(0)
+    teams = ["A Women's", "B Women's", "C Women's", "D Women's"]
+    return pd.concat(
+        [
+            create_match(1000 + i, [teams[i], teams[(i + 1) % 4]], rng)
+            for i in range(3)
+        ],
+        ignore_index=True,
+    )
+
+
+@pytest.fixture
+def tables():
+    """Small tables of a snapshot as expected by Artifacts.write_snapshot,
+    without the optional tables
+    """
+    df_kpis = pd.DataFrame(
+        {"goals_scored": [1, 0]},
+        index=pd.MultiIndex.from_tuples([(1, "A"), (1, "B")]),
+    )
+    df_player = pd.DataFrame(
+        {"value": [0.5]},
+        index=pd.MultiIndex.from_tuples([("A", "a")], names=["team", "p"]),
+    )
+    df_frame = pd.DataFrame(
+        {"team": ["A"], "x": [1.0], "location": [[1.0, 2.0]]}
+    )
+    return {
+        "df_kpis": df_kpis,
+        "df_iv_position_at_opponent_goal_kick": df_frame,
+        "df_goals_xg": df_player,
+        "df_assists_to_xg": df_player,
+        "df_preprocessed": df_frame,
+        "df_passed_opponents": df_player,
+        "df_kpi_profiles": Profiles().run_profiles(df_kpis),
+    }
@@ -0,0 +1,121 @@
+import asyncio
+import json
+import pyarrow as pa
+import threading
+from tornado.httpclient import AsyncHTTPClient
+from tornado.httpserver import HTTPServer
+from tornado.testing import bind_unused_port
+from opponent_analysis.api import KpiApi, make_app
+
+ARROW = {"Accept": "application/vnd.apache.arrow.stream"}
+
+
+def run_requests(tmp_path, tables: dict, requests: list):
+    """Starts the API on a free port, sends the requests one after another
+    and returns the responses and the API
+    """
+    api = KpiApi()
+    api.artifacts.conf.path_to_artifacts = str(tmp_path)
+    api.artifacts.conf.path_to_legacy_artifacts = str(tmp_path)
+    api.artifacts.write_snapshot(tables)
+
+    async def send():
+        sock, port = bind_unused_port()
+        server = HTTPServer(make_app(api))
+        server.add_sockets([sock])
+        client = AsyncHTTPClient()
+        responses = []
+        for path, headers in requests:
+            if callable(headers):
+                headers = headers(responses)
+            responses.append(
+                await client.fetch(
+                    f"http://127.0.0.1:{port}{path}",
+                    headers=headers,
+                    raise_error=False,
+                )
+            )
+        server.stop()
+        return responses
+
+    return asyncio.run(send()), api
+
+
+def test_filters(tmp_path, tables):
+    responses, _ = run_requests(
+        tmp_path,
+        tables,
+        [
+            ("/kpis?team=A", None),
+            ("/kpis?opponent=A&match=1", None),
+            ("/goals_xg?match=1", None),
+            ("/kpis?match=x", None),
+            ("/unknown", None),
+            ("/", None),
+        ],
+    )
+
+    rows = json.loads(responses[0].body)
+    assert len(rows) == 1
+    assert rows[0]["opponent"] == "B"
+    assert rows[0]["goals_scored"] == 1
+    assert [row["team"] for row in json.loads(responses[1].body)] == ["B"]
+    assert [r.code for r in responses[2:5]] == [400, 400, 404]
+    assert json.loads(responses[5].body)["endpoints"][0] == "kpis"
+
+
+def test_arrow_and_etag(tmp_path, tables):
+    responses, api = run_requests(
+        tmp_path,
+        tables,
+        [
+            ("/goals_xg?team=A", ARROW),
+            (
+                "/goals_xg?team=A",
+                lambda responses: {
+                    **ARROW,
+                    "If-None-Match": responses[0].headers["ETag"],
+                },
+            ),
+            ("/goals_xg?team=A", None),
+        ],
+    )
+
+    table = pa.ipc.open_stream(responses[0].body).read_all()
+    assert table.column("player").to_pylist() == ["a"]
+    assert responses[1].code == 304
+    assert responses[2].headers["ETag"] != responses[0].headers["ETag"]
+    assert len(api.cache) == 2
+
+
+def test_reload_in_background(tmp_path, tables, monkeypatch):
+    api = KpiApi()
+    api.conf.api_version_check_seconds = 0
+    api.artifacts.conf.path_to_artifacts = str(tmp_path)
+    api.artifacts.conf.path_to_legacy_artifacts = str(tmp_path)
+    read_names = []
+    read_snapshot = api.artifacts.read_snapshot
+
+    def record_names(version, names=None):
+        read_names.extend(names)
+        return read_snapshot(version, names)
+
+    monkeypatch.setattr(api.artifacts, "read_snapshot", record_names)
+    first = api.artifacts.write_snapshot(tables)
+    assert api.get_snapshot()[0] == first
+    assert "df_preprocessed" not in read_names
+
+    loaded = threading.Event()
+    load_tables = api.load_tables
+
+    def wait_and_load(version):
+        loaded.wait()
+        return load_tables(version)
+
+    monkeypatch.setattr(api, "load_tables", wait_and_load)
+    second = api.artifacts.write_snapshot(tables)
+    # the old snapshot is served until the new one is loaded
+    assert api.get_snapshot()[0] == first
+    loaded.set()
+    api._loading.join()
+    assert api.get_snapshot()[0] == second
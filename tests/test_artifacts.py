@@ -0,0 +1,78 @@
+import os
+import pandas as pd
+from opponent_analysis.artifacts import Artifacts
+
+
+def test_write_and_read_snapshot(tmp_path, tables):
+    artifacts = Artifacts()
+    artifacts.conf.path_to_artifacts = str(tmp_path / "artifacts")
+    artifacts.conf.path_to_legacy_artifacts = str(tmp_path)
+    artifacts.conf.artifacts_to_keep = 1
+
+    assert artifacts.get_current_version() is None
+    assert artifacts.is_outdated(None)
+
+    first = artifacts.write_snapshot(tables)
+    assert artifacts.get_current_version() == first
+    assert not artifacts.is_outdated(first)
+    tables = artifacts.read_snapshot(first)
+    assert tables["df_kpis"].loc[(1, "A"), "goals_scored"] == 1
+    assert tables["df_goals_xg"].index.names == ["team", "p"]
+    assert tables["df_preprocessed"]["location"].tolist() == ["[1.0, 2.0]"]
+    assert isinstance(tables["df_preprocessed"]["x"].dtype, pd.ArrowDtype)
+
+    (tmp_path / "artifacts" / "20000101-000000-1").mkdir()
+    second = artifacts.write_snapshot(tables)
+    assert artifacts.get_current_version() == second
+    assert sorted(p.name for p in (tmp_path / "artifacts").iterdir()) == [
+        second,
+        "CURRENT",
+    ]
+
+
+def test_remove_old_snapshots_keeps_current(tmp_path, tables):
+    artifacts = Artifacts()
+    artifacts.conf.path_to_artifacts = str(tmp_path)
+    artifacts.conf.artifacts_to_keep = 1
+    path = tmp_path / "99990101-000000-1"
+    path.mkdir()
+    stale = tmp_path / ".tmp-20000101-000000-1"
+    stale.mkdir()
+    os.utime(stale, (0, 0))
+
+    version = artifacts.write_snapshot(tables)
+    entries = sorted(p.name for p in tmp_path.iterdir())
+    assert version in entries
+    assert path.name in entries
+    assert stale.name not in entries
+
+    running = artifacts.create_snapshot()
+    artifacts.remove_old_snapshots()
+    assert (tmp_path / f".tmp-{running}").exists()
+
+
+def test_read_table_parts(tmp_path):
+    artifacts = Artifacts()
+    artifacts.conf.path_to_artifacts = str(tmp_path)
+    version = artifacts.create_snapshot()
+    artifacts.add_table_part(
+        version,
+        "df_preprocessed",
+        0,
+        pd.DataFrame({"a": [1, 2], "b": [None, None]}),
+    )
+    artifacts.add_table_part(
+        version,
+        "df_preprocessed",
+        1,
+        pd.DataFrame({"a": [0.5], "b": ["x"], "c": [True]}),
+    )
+    artifacts.publish_snapshot(version)
+
+    df = artifacts.read_table(
+        artifacts._table_path(version, "df_preprocessed")
+    )
+
+    assert df["a"].tolist() == [1.0, 2.0, 0.5]
+    assert df["b"].tolist()[2] == "x"
+    assert df["c"].isna().tolist() == [True, True, False]
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+from opponent_analysis.kpis import KPIs
+from opponent_analysis.preprocessing import Preprocessing
+
+kpis = KPIs()
+
+
+def opponent(x: float, keeper: bool = False):
+    return {"teammate": False, "keeper": keeper, "location": [x, 40.0]}
+
+
+def test_get_defensive_lines():
+    frame_nr = np.array([1, 0, 0, 0, 1, 0, 1])
+    x = np.array([50.0, 30.0, 62.0, 33.0, 52.0, 60.0, 90.0])
+
+    line_nr, line_min_x, line_max_x = kpis.get_defensive_lines(frame_nr, x)
+
+    np.testing.assert_array_equal(line_nr, [0, 0, 1])
+    np.testing.assert_array_equal(line_min_x, [30.0, 60.0, 50.0])
+    np.testing.assert_array_equal(line_max_x, [33.0, 62.0, 52.0])
+
+
+def test_get_broken_lines():
+    freeze_frame = [
+        opponent(30.0),
+        opponent(33.0),
+        opponent(60.0),
+        opponent(62.0),
+        opponent(80.0),
+        opponent(110.0, keeper=True),
+        opponent(112.0),
+        {"teammate": True, "keeper": False, "location": [45.0, 40.0]},
+    ]
+    df = pd.DataFrame(
+        {
+            "team": ["A", "A", "A"],
+            "player": ["a", "a", "b"],
+            "location": [[20.0, 40.0], [40.0, 40.0], [20.0, 40.0]],
+            "pass_end_location": [
+                [70.0, 40.0],
+                [115.0, 40.0],
+                [70.0, 40.0],
+            ],
+            "pass_outcome": [None, None, "Incomplete"],
+            "freeze_frame": [freeze_frame] * 3,
+        }
+    )
+
+    result = kpis.get_broken_lines(df)
+
+    assert result[("A", "a")] == 3
+    assert ("A", "b") not in result.index
+
+
+def test_get_broken_lines_per_player(df_raw):
+    df_preprocessed = Preprocessing().run_preprocessing(df_raw)
+
+    result = kpis.get_broken_lines(df_preprocessed)
+
+    assert result.index.names == ["team", "player"]
+    assert result.is_monotonic_decreasing
+    assert (result >= 0).all() and result.sum() > 0
@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from opponent_analysis.pass_network import PassNetwork
+from opponent_analysis.preprocessing import Preprocessing
+
+pass_network = PassNetwork()
+
+
+def test_get_path_metrics():
+    # a -> b -> c, all passes have to go through b
+    adjacency = sparse.csr_matrix(
+        np.array([[0, 1, 0], [0, 0, 1], [0, 0, 0]], dtype=float)
+    )
+
+    closeness, betweenness = pass_network.get_path_metrics(adjacency)
+
+    np.testing.assert_allclose(closeness, [0, 0.5, 2 / 3])
+    np.testing.assert_allclose(betweenness, [0, 0.5, 0])
+
+
+def test_run_pass_network(df_raw):
+    df_preprocessed = Preprocessing().run_preprocessing(df_raw)
+    df_nodes, df_edges = pass_network.run_pass_network(df_preprocessed)
+
+    assert df_nodes.index.names == ["match_id", "team", "player"]
+    assert df_edges.index.names == ["match_id", "team", "passer", "recipient"]
+    assert df_nodes["passes"].sum() == df_edges["passes"].sum()
+    assert len(df_nodes.groupby(level=["match_id", "team"])) == 6
+    assert df_nodes["degree_centrality"].between(0, 1).all()
+
+    # networks are per match, so a batch gives the same rows
+    match = df_raw["match_id"].iloc[0]
+    df_batch_nodes, _ = pass_network.run_pass_network(
+        Preprocessing().run_preprocessing(df_raw[df_raw["match_id"] == match])
+    )
+    pd.testing.assert_frame_equal(
+        df_batch_nodes, df_nodes.loc[[match]], check_index_type=False
+    )
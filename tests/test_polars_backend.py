@@ -0,0 +1,42 @@
+import pandas as pd
+import pytest
+from opponent_analysis.kpis import KPIs
+from opponent_analysis.preprocessing import Preprocessing
+
+pytest.importorskip("polars")
+
+from opponent_analysis.polars_backend import (  # noqa: E402
+    PolarsKPIs,
+    PolarsPreprocessing,
+)
+
+
+def test_run_preprocessing(df_raw):
+    expected = Preprocessing().run_preprocessing(df_raw)
+
+    result = PolarsPreprocessing().run_preprocessing(df_raw)
+
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_run_kpis(df_raw):
+    df_preprocessed = Preprocessing().run_preprocessing(df_raw)
+    result = PolarsKPIs().run_kpis(df_preprocessed.copy())
+    expected = KPIs().run_kpis(df_preprocessed.copy())
+
+    pd.testing.assert_frame_equal(
+        result[0].sort_index(), expected[0].sort_index()
+    )
+    iv_columns = ["team", "player_id", "delta_goal_kick", "x", "y"]
+    pd.testing.assert_frame_equal(
+        result[1].sort_values(iv_columns).reset_index(drop=True),
+        expected[1].sort_values(iv_columns).reset_index(drop=True),
+    )
+    pd.testing.assert_frame_equal(result[2], expected[2])
+    pd.testing.assert_frame_equal(result[3], expected[3])
+    pd.testing.assert_series_equal(
+        result[4].sort_index(), expected[4].sort_index()
+    )
+    pd.testing.assert_series_equal(
+        result[5].sort_index(), expected[5].sort_index()
+    )
@@ -0,0 +1,55 @@
+import pandas as pd
+import pytest
+from opponent_analysis.profiles import Profiles
+
+profiles = Profiles()
+
+
+@pytest.mark.filterwarnings("error::pandas.errors.PerformanceWarning")
+def test_run_profiles():
+    df_kpis = pd.DataFrame(
+        {
+            "goals_scored": [3, 0, 1, 1],
+            "goals_conceded": [0, 3, 1, 1],
+        },
+        index=pd.MultiIndex.from_tuples(
+            [(1, "A"), (1, "B"), (2, "A"), (2, "C")], names=["match_id", None]
+        ),
+    )
+
+    result = profiles.run_profiles(df_kpis)
+
+    assert result.index.names == ["team", "opponent", "kpi"]
+    assert result.index.is_monotonic_increasing
+    team_a = result.loc[("A", "all")]
+    assert team_a.loc["goals_scored", "Team Values"] == 2
+    assert team_a.loc["goals_scored", "Average"] == 1.25
+    assert team_a.loc["goals_scored", "Rank"] == 1
+    assert team_a.loc["goals_scored", "classification"] == "good"
+    assert team_a.loc["goals_conceded", "Percentile"] == 75
+    assert team_a.loc["goals_conceded", "classification"] == "good"
+    team_b = result.loc[("B", "all")]
+    assert team_b.loc["goals_scored", "classification"] == "bad"
+    assert team_b.loc["goals_conceded", "Rank"] == 3
+    assert team_b.loc["goals_conceded", "classification"] == "bad"
+    assert result.loc[("A", "C", "goals_scored"), "Team Values"] == 1
+    assert result.loc[("A", "C", "goals_scored"), "classification"] == (
+        "average"
+    )
+
+
+def test_run_profiles_low_is_good_at_average():
+    df_kpis = pd.DataFrame(
+        {"goals_conceded": [1, 1, 2, 0, 1, 1]},
+        index=pd.MultiIndex.from_tuples(
+            [(1, "A"), (1, "B"), (2, "C"), (2, "D"), (3, "E"), (3, "F")],
+            names=["match_id", None],
+        ),
+    )
+
+    result = profiles.run_profiles(df_kpis).xs("all", level="opponent")
+
+    classification = result["classification"].droplevel("kpi")
+    assert classification["A"] == "average"
+    assert classification["C"] == "bad"
+    assert classification["D"] == "good"
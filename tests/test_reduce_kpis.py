@@ -0,0 +1,38 @@
+import pandas as pd
+from opponent_analysis.kpis import KPIs
+from opponent_analysis.preprocessing import Preprocessing
+
+preprocessing = Preprocessing()
+kpis = KPIs()
+
+
+def test_reduce_kpis(df_raw):
+    expected = kpis.run_kpis(preprocessing.run_preprocessing(df_raw))
+
+    partials = [
+        kpis.run_kpis(preprocessing.run_preprocessing(df_match))
+        for _, df_match in df_raw.groupby("match_id")
+    ]
+    result = kpis.reduce_kpis(partials)
+
+    pd.testing.assert_frame_equal(
+        result[0].sort_index(), expected[0].sort_index()
+    )
+    iv_columns = ["team", "player_id", "delta_goal_kick", "x", "y"]
+    pd.testing.assert_frame_equal(
+        result[1][iv_columns].sort_values(iv_columns).reset_index(drop=True),
+        expected[1][iv_columns].sort_values(iv_columns).reset_index(drop=True),
+    )
+    for reduced, full in zip(result[2:], expected[2:]):
+        pd.testing.assert_frame_equal(
+            (
+                reduced.sort_index().to_frame()
+                if isinstance(reduced, pd.Series)
+                else reduced.sort_index()
+            ),
+            (
+                full.sort_index().to_frame()
+                if isinstance(full, pd.Series)
+                else full.sort_index()
+            ),
+        )
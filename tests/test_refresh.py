@@ -0,0 +1,89 @@
+from opponent_analysis.data import Data
+from opponent_analysis.refresh import Refresher
+
+
+def test_refresh_swaps_snapshot(tmp_path, tables):
+    refresher = Refresher()
+    refresher.artifacts.conf.path_to_artifacts = str(tmp_path)
+    refresher.artifacts.conf.path_to_legacy_artifacts = str(tmp_path)
+    refresher.build_tables = lambda: tables
+
+    assert refresher.start()
+    refresher._thread.join()
+
+    assert refresher.get_status()["state"] == "done"
+    assert refresher.artifacts.get_current_version() is not None
+
+
+def test_refresh_reports_errors(tmp_path, tables, caplog):
+    def fail():
+        raise ValueError("no data")
+
+    refresher = Refresher()
+    refresher.artifacts.conf.path_to_artifacts = str(tmp_path)
+    refresher.artifacts.conf.path_to_legacy_artifacts = str(tmp_path)
+    refresher.build_tables = fail
+
+    refresher.start()
+    refresher._thread.join()
+
+    status = refresher.get_status()
+    assert status["state"] == "failed"
+    assert status["error"] == "ValueError: no data"
+    assert "Traceback" in caplog.text
+    assert refresher.artifacts.get_current_version() is None
+
+    # the refresh is retried after the backoff
+    assert not refresher.start()
+    refresher.conf.refresh_retry_minutes = 0
+    refresher.build_tables = lambda: tables
+    assert refresher.start()
+    refresher._thread.join()
+    assert refresher.get_status()["state"] == "done"
+
+
+def test_refresh_streaming(tmp_path, monkeypatch, df_raw):
+    monkeypatch.setattr(
+        Data, "get_match_id", lambda self: df_raw.match_id.unique()
+    )
+    monkeypatch.setattr(
+        Data, "load_match", lambda self, m: df_raw[df_raw.match_id == m]
+    )
+    refresher = Refresher()
+    refresher.conf.use_streaming = True
+    refresher.artifacts.conf.path_to_artifacts = str(tmp_path)
+    refresher.artifacts.conf.path_to_legacy_artifacts = str(tmp_path)
+
+    refresher.start()
+    refresher._thread.join()
+
+    assert refresher.get_status()["state"] == "done"
+    version = refresher.artifacts.get_current_version()
+    tables = refresher.artifacts.read_snapshot(version)
+    assert len(tables["df_preprocessed"]) == len(df_raw)
+    assert tables["df_preprocessed"].index.tolist() == list(range(len(df_raw)))
+    assert len(tables["df_kpis"]) == 6
+    assert len(list((tmp_path / version / "df_preprocessed").iterdir())) == 3
+    assert len(tables["df_team_features"]) == 4
+    assert tables["df_player_features"].index.nlevels == 2
+
+
+def test_refresh_runs_in_one_process_only(tmp_path, tables):
+    refresher = Refresher()
+    refresher.artifacts.conf.path_to_artifacts = str(tmp_path)
+    refresher.artifacts.conf.path_to_legacy_artifacts = str(tmp_path)
+    refresher.build_tables = lambda: tables
+    other = Refresher()
+    other.artifacts.conf.path_to_artifacts = str(tmp_path)
+
+    # the lock file of another process blocks the refresh
+    lock_file = other._acquire_process_lock()
+    assert refresher.is_running_elsewhere()
+    assert not refresher.start()
+    lock_file.close()
+
+    assert refresher.start()
+    refresher._thread.join()
+    assert not refresher.is_running_elsewhere()
+    # the other process sees the new snapshot and does not refresh again
+    assert not other.start()
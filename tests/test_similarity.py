@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+from opponent_analysis.kpis import KPIs
+from opponent_analysis.preprocessing import Preprocessing
+from opponent_analysis.similarity import SimilarityFeatures, SimilarityIndex
+
+
+def test_query_returns_nearest_neighbours():
+    df_features = pd.DataFrame(
+        {"a": [1.0, 1.1, -1.0, 5.0], "b": [1.0, 0.9, -1.0, np.nan]},
+        index=["A", "B", "C", "D"],
+    )
+    index = SimilarityIndex()
+    index.build(df_features)
+
+    similar = index.query("A", k=2)
+    assert list(similar.index) == ["B", "D"]
+    assert similar.iloc[0] > similar.iloc[1]
+    assert "A" not in similar.index
+
+
+def test_features_from_batches_match_full_run(df_raw):
+    df_preprocessed = Preprocessing().run_preprocessing(df_raw)
+    features = SimilarityFeatures()
+    full = features.get_event_stats(df_preprocessed)
+    batches = features.reduce_event_stats(
+        [
+            features.get_event_stats(df)
+            for _, df in df_preprocessed.groupby("match_id")
+        ]
+    )
+    pd.testing.assert_frame_equal(full, batches.loc[full.index])
+
+    results = KPIs().run_kpis(df_preprocessed)
+    df_team_features = features.get_team_features(
+        full, results[0], results[1], results[4]
+    )
+    df_player_features = features.get_player_features(
+        full, results[2], results[3], results[4]
+    )
+    assert len(df_team_features) == 4
+    assert not df_player_features.isna().any().any()
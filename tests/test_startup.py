@@ -0,0 +1,41 @@
+import json
+import os
+import subprocess
+import sys
+
+# time budget for importing the dashboard on a cold interpreter, most of it
+# is spent importing streamlit itself
+IMPORT_TIME_BUDGET_SECONDS = 3.0
+DEFERRED_MODULES = [
+    "matplotlib",
+    "mplsoccer",
+    "statsbombpy",
+    "polars",
+    "scipy",
+]
+
+BENCHMARK = f"""
+import json
+import sys
+import time
+start = time.perf_counter()
+import streamlit_app
+duration = time.perf_counter() - start
+loaded = [m for m in {DEFERRED_MODULES!r} if m in sys.modules]
+print(json.dumps({{"duration": duration, "loaded": loaded}}))
+"""
+
+
+def test_import_time():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run(
+        [sys.executable, "-W", "ignore", "-c", BENCHMARK],
+        cwd=root,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+
+    assert result["loaded"] == []
+    assert result["duration"] < IMPORT_TIME_BUDGET_SECONDS